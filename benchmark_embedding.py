@@ -0,0 +1,60 @@
+import os
+import time
+
+import networkx as nx
+import pandas as pd
+from tqdm import tqdm
+
+from graph_coloring.non_generic.planar_triangle_free.embedding import get_half_edge_embedding
+
+
+def time_embedding(graph, use_planarity):
+    start_time = time.time()
+    embedding = get_half_edge_embedding(graph, use_planarity=use_planarity)
+    total_time = time.time() - start_time
+
+    assert embedding is not None
+    return total_time
+
+
+def benchmark_embeddings(path='results/result_planar.csv', result_path='results/result_embedding.csv'):
+    """
+    Compare getting the planar embedding from the planarity extension and from networkx,
+    for all graphs in the planar results corpus.
+    :param path: CSV with the planar results, of which the graph paths are used
+    :param result_path: CSV to write the timings to
+    :return: Data frame with the timings per graph
+    """
+    graph_paths = pd.read_csv(path)['graph_path'].unique()
+
+    rows = []
+    tqdm_paths = tqdm(graph_paths)
+    tqdm_paths.set_description(desc="Embedding graphs", refresh=True)
+
+    for graph_path in tqdm_paths:
+        if not os.path.isfile(f"graphs/{graph_path}"):
+            print(f"Graph {graph_path} not found, skipping...")
+            continue
+
+        graph = nx.read_adjlist(f"graphs/{graph_path}")
+
+        rows.append({
+            'nodes': len(graph.nodes),
+            'edges': len(graph.edges),
+            'planarity': time_embedding(graph, True),
+            'networkx': time_embedding(graph, False),
+            'graph_path': graph_path,
+        })
+
+    results = pd.DataFrame(rows, columns=['nodes', 'edges', 'planarity', 'networkx', 'graph_path'])
+
+    if len(results) > 0:
+        results.to_csv(result_path, index=False)
+        print(f"Planarity extension took {results['planarity'].sum()} seconds, "
+              f"networkx took {results['networkx'].sum()} seconds")
+
+    return results
+
+
+if __name__ == '__main__':
+    benchmark_embeddings()
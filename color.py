@@ -1,11 +1,13 @@
+import argparse
 import os
-import sys
 import time
+from functools import partial
 
 import networkx as nx
 import pandas as pd
 from func_timeout import FunctionTimedOut
 
+from graph_coloring.decomposition import solve_by_blocks, solve_by_components
 from graph_coloring.exceptions import InvalidGraphException
 from graph_coloring.generic.csp.solve import csp_solve
 from graph_coloring.generic.dsatur.solve import dsatur_solve
@@ -24,50 +26,88 @@ def draw_and_check_coloring(graph, colors):
     GraphChecker().valid_3_coloring(graph, colors)
 
 
-def color_graph(graph, graph_name, method):
-    print(f"Copying graph for method {method}")
-    original_graph = graph.copy()
+def solve_with_method(graph, graph_name, method, by_blocks=False):
+    if by_blocks:
+        return solve_by_blocks(graph, partial(solve_with_method, graph_name=graph_name, method=method))
 
-    print(f"Execution using {method} starting")
-    start_time = time.time()
     match method:
         case 'sat':
-            colors = sat_solve(graph, graph_name)
+            return sat_solve(graph, graph_name)
         case 'dsatur':
-            colors = dsatur_solve(graph)
+            return dsatur_solve(graph)
         case 'csp':
             try:
-                colors = csp_solve(graph)
+                return csp_solve(graph)
             except FunctionTimedOut:
                 print("CSP: could not complete within the set time and was terminated...\n")
-                colors = 'timeout'
+                return 'timeout'
             except RecursionError:
                 print("CSP: maximum recursion depth reached, exiting...\n")
-                colors = 'timeout'
+                return 'timeout'
         case 'planar':
-            colors = planar_solve(graph)
+            return planar_solve(graph)
         case 'locally_connected':
-            colors = locally_connected_solve(graph)
+            return locally_connected_solve(graph)
         case 'p7_c3':
-            colors = p7_c3_solve(graph)
+            return p7_c3_solve(graph)
         case _:
             raise InvalidGraphException('Type not found...')
 
+
+def color_graph(graph, graph_name, method, by_blocks=False, by_components=False, max_workers=None):
+    print(f"Copying graph for method {method}")
+    original_graph = graph.copy()
+
+    print(f"Execution using {method} starting")
+    start_time = time.time()
+
+    solve = partial(solve_with_method, graph_name=graph_name, method=method, by_blocks=by_blocks)
+
+    if by_components:
+        colors = solve_by_components(graph, solve, max_workers)
+    else:
+        colors = solve(graph)
+
     if colors == 'timeout':
         return None
 
     total_time = time.time() - start_time
     print(f"Execution took {total_time} seconds\n")
 
-    write_results(graph_name, method, total_time)
+    method_name = method + ('_components' if by_components else '') + ('_blocks' if by_blocks else '')
+    write_results(graph_name, method_name, total_time)
 
-    if colors is not None:
+    # DSATUR gives the number of colors it used when it needs more than 3
+    if isinstance(colors, dict):
         draw_and_check_coloring(original_graph, colors)
         return True
     return False
 
 
-def match_graph_type(path, graph_type):
+def read_planted_coloring(path):
+    """
+    Read the coloring that was planted in the given graph, with the nodes as strings like nx.read_adjlist gives them.
+    :param path: The file name of the graph
+    :return: Dict of colors for all nodes
+    """
+    with open(f"colorings/{path}") as file:
+        return dict(line.split() for line in file)
+
+
+def match_planted(graph, path, **decomposition):
+    # The planted coloring proves that the graph is 3-colorable, so no solver has to confirm the others
+    GraphChecker().valid_3_coloring(graph, read_planted_coloring(path))
+
+    for method in ['sat', 'csp', 'dsatur']:
+        colorable = color_graph(graph.copy(), path, method, **decomposition)
+
+        # DSATUR is a heuristic and may miss the coloring, an exact solver may only time out
+        if method != 'dsatur' and colorable is not None:
+            assert colorable
+
+
+def match_graph_type(path, graph_type, by_blocks=False, by_components=False, max_workers=None):
+    decomposition = {'by_blocks': by_blocks, 'by_components': by_components, 'max_workers': max_workers}
     graph_dict = convert_path_to_dict(path)
 
     if graph_dict['graph_type'] != graph_type:
@@ -81,20 +121,36 @@ def match_graph_type(path, graph_type):
     draw_graph(graph, None)
     print(f"Finished drawing {path}")
 
+    if graph_type == 'planted':
+        match_planted(graph, path, **decomposition)
+        return
+
     # dsatur_colorable = color_graph(graph, path, 'dsatur')
 
-    sat_colorable = color_graph(graph, path, 'sat')
-    csp_colorable = color_graph(graph, path, 'csp')
+    sat_colorable = color_graph(graph, path, 'sat', **decomposition)
+    csp_colorable = color_graph(graph, path, 'csp', **decomposition)
 
-    graph_type_colorable = color_graph(graph, path, graph_dict['graph_type'])
+    graph_type_colorable = color_graph(graph, path, graph_dict['graph_type'], **decomposition)
     assert graph_type_colorable == sat_colorable
 
     if csp_colorable is not None:
         assert csp_colorable == sat_colorable
 
 
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark the 3-coloring methods on the graphs of a type")
+    parser.add_argument('graph_type', help="The graph type to benchmark, as read from the graph file names")
+    parser.add_argument('--by-blocks', action='store_true', help="Color the graphs block by block")
+    parser.add_argument('--by-components', action='store_true',
+                        help="Color the connected components of the graphs in parallel processes")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Maximum number of processes for the components, defaults to the number of processors")
+
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
-    graph_type = sys.argv[1]
+    arguments = parse_arguments()
 
     results = list(pd.read_csv('results/result.csv')['graph_path'])
 
@@ -107,4 +163,5 @@ if __name__ == '__main__':
             print("Already benchmarked...\n")
             continue
 
-        match_graph_type(graph_path, graph_type)
+        match_graph_type(graph_path, arguments.graph_type, arguments.by_blocks, arguments.by_components,
+                         arguments.workers)
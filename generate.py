@@ -1,25 +1,123 @@
+import argparse
+import itertools
+import os
 import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from graph_generation.graph_checker import GraphChecker
 from graph_generation.graph_generator import GraphGenerator
 
-graph_generator = GraphGenerator(checker=GraphChecker)
-
-# p path cycle planar diameter locally_connected
-configurations = [
-    # [0.1, None, 3, True, None, None],
-    # [0.5, 7, 3, None, None, None],
-    [0.01, None, None, None, None, True],
-]
-
-for config in configurations:
-    for i, n in enumerate([100]):
-    # for n in [100]:
-        shuffle = True
-        start_time = time.time()
-        print(f"Generating graph with nodes {n}, p: {config[0]}, path: {config[1]}, cycle: {config[2]}, "
-              f"planar: {config[3]}, diameter: {config[4]}, locally_connected: {config[5]}, shuffle: {shuffle}")
-        g = graph_generator.find_graphs_with_conditions(n, config[0], config[1], config[2], config[3], config[4],
-                                                        config[5], shuffle=shuffle, seed=i+1)
-        total_time = time.time() - start_time
-        print(f"Generation took {total_time} seconds")
+# The conditions of find_graphs_with_conditions for every graph class
+GRAPH_CLASSES = {
+    'planar': {'cycle_size': 3, 'planar': True},
+    'p7_c3': {'path_length': 7, 'cycle_size': 3},
+    'locally_connected': {'locally_connected': True},
+    'planted': {'planted': 'planted'},
+    'quiet': {'planted': 'quiet'},
+}
+# The graph classes that have a constructive generator, the others are generated the same way either way
+CONSTRUCTIVE_CLASSES = {'planar', 'p7_c3'}
+
+
+def get_instance_path(n, p, graph_class, seed, constructive=False):
+    """
+    Get the file name of an instance without extension. It has the same fields as the timestamped names of
+    find_graphs_with_conditions, so the benchmarks can read it, but ends in the seed instead, so it is the same on
+    every run.
+    :param n: The number of nodes
+    :param p: The edge probability
+    :param graph_class: The key of the graph class in GRAPH_CLASSES
+    :param seed: The seed of the instance in the grid
+    :param constructive: Use the constructive generators where they exist
+    :return: The file name
+    """
+    conditions = GRAPH_CLASSES[graph_class]
+    planted = conditions.get('planted')
+    constructive = constructive and graph_class in CONSTRUCTIVE_CLASSES
+
+    return f"graph-nodes-{n}-p-{p}-path-{conditions.get('path_length')}-cycle-{conditions.get('cycle_size')}-" \
+           f"planar-{conditions.get('planar')}-diameter-None-locally_connected-{conditions.get('locally_connected')}-" \
+           f"shuffle-True{'-constructive' if constructive else ''}{f'-{planted}' if planted else ''}-seed-{seed}"
+
+
+def generate_instance(n, p, graph_class, seed, constructive=False):
+    """
+    Generate a single instance and write it to the graphs folder. The random seed is derived from the file name, so
+    the instance does not depend on which process generates it, or on the other instances in the grid.
+    :param n: The number of nodes
+    :param p: The edge probability
+    :param graph_class: The key of the graph class in GRAPH_CLASSES
+    :param seed: The seed of the instance in the grid
+    :param constructive: Use the constructive generators where they exist
+    :return: The file name and the time the generation took in seconds
+    """
+    path = get_instance_path(n, p, graph_class, seed, constructive)
+    instance_seed = zlib.crc32(path.encode())
+
+    start_time = time.time()
+    GraphGenerator(checker=GraphChecker).find_graphs_with_conditions(n, p, shuffle=True, seed=instance_seed,
+                                                                     constructive=constructive, path=path,
+                                                                     **GRAPH_CLASSES[graph_class])
+
+    return path, time.time() - start_time
+
+
+def generate_corpus(nodes, ps, graph_classes, seeds, constructive=False, max_workers=None):
+    """
+    Generate all instances of the grid of nodes, edge probabilities, classes and seeds in parallel processes.
+    Instances of which the graph file already exists are skipped, so an interrupted run can simply be started again.
+    :param nodes: List of numbers of nodes
+    :param ps: List of edge probabilities
+    :param graph_classes: List of keys in GRAPH_CLASSES
+    :param seeds: List of seeds, one instance is generated per seed for every other combination
+    :param constructive: Use the constructive generators where they exist
+    :param max_workers: Maximum number of processes, defaults to the number of processors
+    :return: List of the file names of the generated instances
+    """
+    instances = []
+
+    for graph_class, n, p, seed in itertools.product(graph_classes, nodes, ps, seeds):
+        if os.path.isfile(f"graphs/{get_instance_path(n, p, graph_class, seed, constructive)}.txt"):
+            print(f"Instance {graph_class} with {n} nodes, p: {p}, seed: {seed} already exists, skipping...")
+            continue
+
+        instances.append((n, p, graph_class, seed))
+
+    # The largest instances go first, so the longest one does not start last
+    instances.sort(key=lambda instance: instance[0] * instance[1], reverse=True)
+    print(f"Generating {len(instances)} instances")
+
+    generated = []
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(generate_instance, *instance, constructive) for instance in instances]
+
+        for future in as_completed(futures):
+            path, total_time = future.result()
+            print(f"Generating {path} took {total_time} seconds")
+            generated.append(path)
+
+    return generated
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Generate a corpus of graphs for the 3-coloring benchmarks")
+    parser.add_argument('--nodes', type=int, nargs='+', required=True, help="Numbers of nodes")
+    parser.add_argument('--p', type=float, nargs='+', required=True, help="Edge probabilities")
+    parser.add_argument('--classes', nargs='+', required=True, choices=list(GRAPH_CLASSES), help="Graph classes")
+    parser.add_argument('--seeds', type=int, nargs='+', default=[1], help="Seeds, one instance per seed")
+    parser.add_argument('--constructive', action='store_true',
+                        help="Use the constructive planar and p7_c3 generators instead of rejection sampling")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Maximum number of processes, defaults to the number of processors")
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    start_time = time.time()
+    generate_corpus(arguments.nodes, arguments.p, arguments.classes, arguments.seeds, arguments.constructive,
+                    arguments.workers)
+    print(f"Generation took {time.time() - start_time} seconds")
@@ -0,0 +1,189 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import networkx as nx
+
+COLORS = ['red', 'green', 'blue']
+
+
+def get_blocks(graph: nx.Graph):
+    """
+    Split the given graph into its biconnected blocks. Bridges form a block of 2 nodes, and isolated nodes a block of
+    their own, so every node is in at least one block and every edge in exactly one.
+    :param graph: The graph to be split
+    :return: List of node sets, one per block
+    """
+    blocks = [set(block) for block in nx.biconnected_components(graph)]
+    blocks.extend({node} for node in nx.isolates(graph))
+
+    return blocks
+
+
+def color_trivial_block(block):
+    """
+    Color a block of at most 2 nodes, which is a single node or a bridge.
+    :param block: The nodes of the block
+    :return: Dict of node: color pairs
+    """
+    return {node: color for node, color in zip(block, COLORS)}
+
+
+def merge_block_colorings(blocks, block_colorings):
+    """
+    Stitch the colorings of the blocks together along the block-cut tree. Blocks are visited breadth first, so every
+    block shares exactly one colored node with the blocks before it in its component, its cut vertex. The colors of
+    the block are permuted so its cut vertex keeps the color it already has, which keeps the block coloring valid.
+    :param blocks: List of node sets, one per block
+    :param block_colorings: List of color dicts, one per block
+    :return: Dict of node: color pairs for the whole graph
+    """
+    node_blocks = {}
+    for i, block in enumerate(blocks):
+        for node in block:
+            node_blocks.setdefault(node, []).append(i)
+
+    colors = {}
+    visited = [False] * len(blocks)
+
+    for root in range(len(blocks)):
+        if visited[root]:
+            continue
+
+        visited[root] = True
+        queue = deque([root])
+
+        while len(queue) > 0:
+            i = queue.popleft()
+            block_coloring = block_colorings[i]
+            cut_vertex = next((node for node in blocks[i] if node in colors), None)
+
+            if cut_vertex is None:
+                colors.update(block_coloring)
+            else:
+                # Swap the block color of the cut vertex with the color it already has
+                block_color, color = block_coloring[cut_vertex], colors[cut_vertex]
+                permutation = {block_color: color, color: block_color}
+                colors.update({node: permutation.get(node_color, node_color)
+                               for node, node_color in block_coloring.items()})
+
+            for node in blocks[i]:
+                for j in node_blocks[node]:
+                    if not visited[j]:
+                        visited[j] = True
+                        queue.append(j)
+
+    return colors
+
+
+def solve_by_blocks(graph: nx.Graph, solve):
+    """
+    Get a 3-coloring for the given graph by coloring each biconnected block on its own, since a graph is
+    3-colorable exactly when all of its blocks are. Blocks of at most 2 nodes are colored without the solver.
+    :param graph: The graph to be colored
+    :param solve: Function getting the coloring for a single block, returning a color dict or a failure value
+    :return: Dict of colors for all nodes, or the failure value of the first block that could not be colored
+    """
+    blocks = get_blocks(graph)
+    print(f'Blocks: split graph into {len(blocks)} blocks, '
+          f'the largest has {max((len(block) for block in blocks), default=0)} nodes')
+
+    block_colorings = []
+
+    for block in blocks:
+        if len(block) <= 2:
+            block_colorings.append(color_trivial_block(block))
+            continue
+
+        # Solvers change the graph they get, so they get a copy of the block
+        block_coloring = solve(graph.subgraph(block).copy())
+
+        if not isinstance(block_coloring, dict):
+            print('Blocks: block could not be colored...')
+            return block_coloring
+
+        block_colorings.append(block_coloring)
+
+    return merge_block_colorings(blocks, block_colorings)
+
+
+def color_tree(graph: nx.Graph):
+    """
+    Color a tree, which includes isolated nodes and paths, with 2 colors by alternating them along a breadth first
+    search.
+    :param graph: The tree to be colored
+    :return: Dict of node: color pairs
+    """
+    root = next(iter(graph.nodes))
+    colors = {root: COLORS[0]}
+
+    for parent, child in nx.bfs_edges(graph, root):
+        colors[child] = COLORS[1] if colors[parent] == COLORS[0] else COLORS[0]
+
+    return colors
+
+
+def solve_by_components(graph: nx.Graph, solve, max_workers=None):
+    """
+    Get a 3-coloring for the given graph by coloring each connected component on its own, in parallel processes.
+    Trees are colored without the solver, the other components are handed out largest first, so the largest one
+    does not start last. As soon as a component can not be colored, the ones that did not start yet are cancelled.
+    :param graph: The graph to be colored
+    :param solve: Picklable function getting the coloring for a single component, returning a color dict or a
+                  failure value
+    :param max_workers: Maximum number of processes, defaults to the number of processors
+    :return: Dict of colors for all nodes, or the failure value of the first component that could not be colored
+    """
+    components = sorted(nx.connected_components(graph), key=len, reverse=True)
+    print(f'Components: split graph into {len(components)} components, '
+          f'the largest has {len(components[0]) if len(components) > 0 else 0} nodes')
+
+    colors = {}
+    tasks = []
+
+    for component in components:
+        component_graph = graph.subgraph(component).copy()
+
+        if component_graph.number_of_edges() == len(component) - 1:
+            colors.update(color_tree(component_graph))
+        else:
+            tasks.append(component_graph)
+
+    if len(tasks) <= 1 or max_workers == 1:
+        for component_graph in tasks:
+            component_coloring = solve(component_graph)
+
+            if not isinstance(component_coloring, dict):
+                print('Components: component could not be colored...')
+                return component_coloring
+
+            colors.update(component_coloring)
+
+        return colors
+
+    failed_coloring = None
+    failed = False
+
+    # Leaving the with block cancels nothing itself, but waits for the running components, so no worker outlives the
+    # call, while the components that did not start yet are cancelled below
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(solve, component_graph) for component_graph in tasks]
+
+        for future in as_completed(futures):
+            component_coloring = future.result()
+
+            if not isinstance(component_coloring, dict):
+                print('Components: component could not be colored, cancelling the remaining components...')
+                failed_coloring = component_coloring
+                failed = True
+
+                for other_future in futures:
+                    other_future.cancel()
+
+                break
+
+            colors.update(component_coloring)
+
+    if failed:
+        return failed_coloring
+
+    return colors
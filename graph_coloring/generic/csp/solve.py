@@ -290,6 +290,8 @@ def csp_solve(graph: nx.Graph):
         print('CSP: No 3-coloring possible!')
         return None
 
+    # Isolated vertices have no edges to bring them back
+    graph.add_nodes_from(low_degree_vertices)
     add_nodes_with_edges(graph, removed_low_degree_edges)
     add_nodes_with_edges(graph, removed_bushy_forest_edges)
 
@@ -1,10 +1,8 @@
-import itertools
-
 import networkx as nx
 from tqdm import tqdm
 
 from graph_coloring.exceptions import InvalidGraphException
-from graph_coloring.misc import intersection, get_vertices_of_degree_n
+from graph_coloring.misc import get_vertices_of_degree_n
 
 
 def get_triangle_from_neighbors(graph, vertex):
@@ -18,65 +16,83 @@ def get_triangle_from_neighbors(graph, vertex):
 
     for neighbor_1 in neighbors:
         for neighbor_2 in neighbors:
-            if neighbor_1 in graph.neighbors(neighbor_2) \
-                    and neighbor_1 != neighbor_2:
+            if neighbor_1 != neighbor_2 and graph.has_edge(neighbor_1, neighbor_2):
                 return [vertex, neighbor_1, neighbor_2]
 
     raise InvalidGraphException('This should not happen with a locally connected graph.')
 
 
-def get_W(H):
+def add_frontier_edge(frontier, x, y):
     """
-    Get the W partition of the bipartite H.
-    :param H: The bipartite graph H
-    :return: List of vertices in the set W
+    Add an edge to the given bipartite frontier graph, stored as adjacency sets.
+    :param frontier: Dict of node: set of neighbors, representing H or H'
+    :param x: First node of the edge
+    :param y: Second node of the edge
     """
-    return [x for x, y in H.nodes(data=True) if y['bipartite'] == 'W']
+    frontier.setdefault(x, set()).add(y)
+    frontier.setdefault(y, set()).add(x)
 
 
-def get_U(H):
+def remove_frontier_edge(frontier, x, y):
     """
-    Get the U partition of the bipartite H.
-    :param H: The bipartite graph H
-    :return: List of vertices in the set U
+    Remove an edge from the given bipartite frontier graph, and remove the nodes that have no neighbors left.
+    :param frontier: Dict of node: set of neighbors, representing H or H'
+    :param x: First node of the edge
+    :param y: Second node of the edge
     """
-    return [x for x, y in H.nodes(data=True) if y['bipartite'] == 'U']
+    for node, neighbor in [(x, y), (y, x)]:
+        neighbors = frontier.get(node)
+
+        if neighbors is None:
+            continue
+
+        neighbors.discard(neighbor)
 
+        if len(neighbors) == 0:
+            del frontier[node]
 
-def get_W_prime(H, graph, w):
+
+def get_H_prime(graph, H, W, U, w):
     """
-    Get W_i' as defined by N(w_i) ∩ W_i
-    :param H: The bipartite graph with sets W and U
+    Get W_i' as defined by N(w_i) ∩ W_i, U_i' as defined by N(w_i) ∩ U_i, and H_i' as the subgraph of H_i
+    induced by W_i' and U_i'.
     :param graph: Graph to get the neighbors of w from
+    :param H: The bipartite graph with sets W and U, as adjacency sets
+    :param W: Set of vertices in W
+    :param U: Set of vertices in U
     :param w: The distinguished vertex from W
-    :return: List of vertices as defined as W'
+    :return: The sets W' and U', and the graph H' as adjacency sets
     """
-    return intersection(graph.neighbors(w), get_W(H), sort=True)
+    W_prime = set()
+    U_prime = set()
 
+    for neighbor in graph.neighbors(w):
+        if neighbor in W:
+            W_prime.add(neighbor)
+        elif neighbor in U:
+            U_prime.add(neighbor)
 
-def get_U_prime(H, graph, w):
-    """
-    Get U_i' as defined by N(w_i) ∩ U_i
-    :param H: The bipartite graph with sets W and U
-    :param graph: Graph to get the neighbors of w from
-    :param w: The distinguished vertex from U
-    :return: List of vertices as defined as U'
-    """
-    return intersection(list(graph.neighbors(w)), get_U(H), sort=True)
+    H_prime = {}
+
+    for u in U_prime:
+        for u_neighbor in H.get(u, ()):
+            if u_neighbor in W_prime:
+                add_frontier_edge(H_prime, u_neighbor, u)
+
+    return W_prime, U_prime, H_prime
 
 
 def get_v_i(H_prime, U_prime):
     """
     Greedily get v_i from U' where (v_i, v_i_prime) is and edge in H'
-    :param H_prime: Graph to get v_i from
+    :param H_prime: Graph to get v_i from, as adjacency sets
     :param U_prime: Set to get v_i_prime from
     :return: The node v_i
     """
     for v_i in U_prime:
-        for v_i_prime in H_prime:
-            # This should always be the case, but sanity check it regardless
-            if H_prime.has_edge(v_i, v_i_prime):
-                return v_i
+        # Nodes without neighbors are not stored in H'
+        if v_i in H_prime:
+            return v_i
 
     raise InvalidGraphException("I think this should not happen? Investigate")
 
@@ -92,28 +108,26 @@ def update_H(graph, v_i, V_i_1, H, W, U):
     If v_i has degree 0 in H_i after all these changes, delete v_i from H_i, otherwise move v_i from
     U_i to W_i.
     """
-    neighbor_set = set(graph.neighbors(v_i))
-    for x in neighbor_set:
+    for x in graph.neighbors(v_i):
         if x not in V_i_1:
-            H.add_edge(x, v_i)
+            add_frontier_edge(H, x, v_i)
 
             # U_i-i and U_i are sets, so only unique elements can exist
             # If it wasn't there already we can add it regardless
             U.add(x)
         else:
-            if list(H.neighbors(x)) == [v_i]:
-                W.remove(x)
+            remove_frontier_edge(H, x, v_i)
 
-            H.remove_edge(x, v_i)
+            if x not in H:
+                W.discard(x)
 
-    if H.degree[v_i] == 0:
-        H.remove_node(v_i)
-    else:
-        U.remove(v_i)
-        W.append(v_i)
+    U.discard(v_i)
+
+    if v_i in H:
+        W.add(v_i)
 
 
-def update_H_prime(graph, v_i, H, W, H_prime, W_prime, U_prime, W_prime_i_1, U_prime_i_1):
+def update_H_prime(graph, v_i, H, W, H_prime, W_prime, U_prime):
     """
     Update the graph H' according to the following rules:
 
@@ -122,100 +136,64 @@ def update_H_prime(graph, v_i, H, W, H_prime, W_prime, U_prime, W_prime_i_1, U_p
     • If x ∈ W′_{i−1}, delete (x, v_i) from H′_i; if x /∈ Wi, delete x from W′_i .
     • If x ∈ U′_{i−1}, add (x, v_i) to H′_i (in this case v_i ∈ V(H_i)).
     • If x /∈ W′_{i−1}, U′_{i−1}, no changes are made for x and (x, v_i)
+
+    Every x is visited once and v_i is only moved afterwards, so W' and U' are updated in place.
     """
     for x in graph.neighbors(v_i):
-        if x in W_prime_i_1:
-            H_prime.remove_edge(x, v_i)
+        if x in W_prime:
+            remove_frontier_edge(H_prime, x, v_i)
 
             if x not in W:
-                W_prime.remove(x)
-        if x in U_prime_i_1:
-            H_prime.add_edge(x, v_i)
+                W_prime.discard(x)
+                H_prime.pop(x, None)
+        elif x in U_prime:
+            add_frontier_edge(H_prime, x, v_i)
 
-    if v_i not in list(H.nodes):
-        H_prime.remove_node(v_i)
+    U_prime.discard(v_i)
+
+    if v_i not in H:
+        H_prime.pop(v_i, None)
     else:
-        U_prime.remove(v_i)
-        W_prime.append(v_i)
+        W_prime.add(v_i)
 
 
-def check_color_allowed(graph, node, color_dict):
+def get_forcing_triangle(graph, v_i, w, color_dict):
     """
-    Check if the current coloring creates an impossible coloring for the given node.
-    :param graph: Graph to check coloring from
-    :param node: Node that coloring is checked for
-    :param color_dict: Dict containing the allowed colors
-    :return: Bool whether it is allowed
+    Get the already colored triangle edge that v_i closes, which always contains the distinguished vertex w.
+    :param graph: Graph to get the triangle from
+    :param v_i: The vertex that was just added to the ordering
+    :param w: The distinguished vertex, which is a colored neighbor of v_i
+    :param color_dict: Dict containing the colors of the vertices in the ordering
+    :return: The two colored vertices that form a triangle with v_i
     """
-    neighbors = list(graph.neighbors(node))
-
-    for neighbor in neighbors:
-        allowed_colors = ['red', 'green', 'blue']
-        neighbor_neighbors = list(graph.neighbors(neighbor))
-
-        for nn in neighbor_neighbors:
-            if nn in color_dict and color_dict[nn] in allowed_colors:
-                allowed_colors.remove(color_dict[nn])
-
-        if len(allowed_colors) == 0:
-            return False
+    for neighbor in graph.neighbors(v_i):
+        if neighbor != w and neighbor in color_dict and graph.has_edge(neighbor, w):
+            return w, neighbor
 
-    return True
+    raise InvalidGraphException('This should not happen with a 3-clique ordering.')
 
 
-def color_using_ordering(graph, ordering):
+def color_next_in_ordering(graph, v_i, w, color_dict):
     """
-    Color the given graph using the given vertex ordering.
+    Color the vertex that was just added to the 3-clique ordering, with the color forced by the triangle it closes,
+    and update the color dict.
     :param graph: Graph to color
-    :param ordering: Ordering to be used
-    :return: Dict of colors or None
+    :param v_i: The vertex that was just added to the ordering
+    :param w: The distinguished vertex, which is a colored neighbor of v_i
+    :param color_dict: Dict containing the colors of the vertices in the ordering
+    :return: Bool whether the forced color does not conflict with the already colored neighbors
     """
-    colors = {ordering[0]: 'red', ordering[1]: 'green', ordering[2]: 'blue'}
-
-    for i in range(3, len(ordering)):
-        v_i = ordering[i]
-        neighbors = list(graph.neighbors(v_i))
-        i_colors = ['red', 'green', 'blue']
-
-        for subset in itertools.combinations(colors.items(), 2):
-            u = subset[0][0]
-            c_u = subset[0][1]
-            v = subset[1][0]
-            c_v = subset[1][1]
-
-            # This is not a triangle
-            if u not in list(graph.neighbors(v)):
-                continue
-
-            if u in neighbors and v in neighbors:
-                if c_u == c_v:
-                    return None
-                if c_u in i_colors:
-                    i_colors.remove(c_u)
-                if c_v in i_colors:
-                    i_colors.remove(c_v)
-
-        if len(i_colors) > 0:
-            temp_i_colors = i_colors.copy()
-            for i_color in i_colors:
-                temp_colors = colors.copy()
-                temp_colors = temp_colors | {v_i: i_color}
-
-                # Check if the current coloring creates a node with 3 different color neighbors
-                # And if so, remove the color from the allowed list
-                if check_color_allowed(graph, v_i, temp_colors):
-                    colors = temp_colors
-                    break
-                else:
-                    temp_i_colors.remove(i_color)
-
-            # If the current node has no allowed colors anymore, a coloring is not possible
-            if len(temp_i_colors) == 0:
-                return None
-        else:
-            return None
+    u, v = get_forcing_triangle(graph, v_i, w, color_dict)
+    i_colors = ['red', 'green', 'blue']
+    i_colors.remove(color_dict[u])
+    i_colors.remove(color_dict[v])
+    color_dict[v_i] = i_colors[0]
+
+    for neighbor in graph.neighbors(v_i):
+        if neighbor in color_dict and color_dict[neighbor] == color_dict[v_i]:
+            return False
 
-    return colors
+    return True
 
 
 def locally_connected_solve(graph: nx.Graph):
@@ -235,45 +213,41 @@ def locally_connected_solve(graph: nx.Graph):
     assert len(list(nx.connected_components(graph))) == 1
 
     # Get the initial V_3 with an arbitrary triangle (in this case just the first vertex)
-    V = get_triangle_from_neighbors(graph, list(graph.nodes)[0])
-    H = nx.Graph()
+    V = get_triangle_from_neighbors(graph, next(iter(graph.nodes)))
+    V_set = set(V)
+    H = {}
+    W = set()
+    U = set()
     for v in V:
         for neighbor in graph.neighbors(v):
-            if neighbor in V:
+            if neighbor in V_set:
                 continue
 
-            H.add_nodes_from([v], bipartite='W')
-            H.add_nodes_from([neighbor], bipartite='U')
-            H.add_edge(v, neighbor)
+            W.add(v)
+            U.add(neighbor)
+            add_frontier_edge(H, v, neighbor)
 
     # Get w_3 arbitrarily, so greedily the first element in W_i
-    W = get_W(H)
-    U = get_U(H)
-    w = W[0]
-    W_prime = get_W_prime(H, graph, w)
-    U_prime = get_U_prime(H, graph, w)
-    H_prime = nx.subgraph(H, W_prime + U_prime).copy()
+    w = next(v for v in V if v in W)
+    W_prime, U_prime, H_prime = get_H_prime(graph, H, W, U, w)
+
+    color_dict = {V[0]: 'red', V[1]: 'green', V[2]: 'blue'}
 
     tqdm_nodes = tqdm(range(3, len(graph.nodes)))
     tqdm_nodes.set_description(desc="Creating 3-clique ordering", refresh=True)
 
-    U = set(U)
-
     # Incrementally create a 3-clique ordering for the graph
     for _ in tqdm_nodes:
         # Save the previous iteration for later use
         w_i_1 = w
-        W_prime_i_1 = W_prime.copy()
-        U_prime_i_1 = U_prime.copy()
 
         # Get new v_i and update H accordingly
         v_i = get_v_i(H_prime, U_prime)
-        update_H(graph, v_i, V, H, W, U)
+        update_H(graph, v_i, V_set, H, W, U)
         V.append(v_i)
+        V_set.add(v_i)
 
-        temp_color_dict = color_using_ordering(graph, V)
-
-        if temp_color_dict is None:
+        if not color_next_in_ordering(graph, v_i, w, color_dict):
             print('Locally Connected: No 3-coloring possible!\n')
             return None
 
@@ -282,33 +256,10 @@ def locally_connected_solve(graph: nx.Graph):
 
         if w_i_1 in W:
             w = w_i_1
-            update_H_prime(graph, v_i, H, W, H_prime, W_prime, U_prime, W_prime_i_1, U_prime_i_1)
+            update_H_prime(graph, v_i, H, W, H_prime, W_prime, U_prime)
         else:
-            for vertex in W:
-                if w != vertex:
-                    w = vertex
-
-            W_prime = intersection(graph.neighbors(w), W, sort=True)
-            U_prime = intersection(graph.neighbors(w), U, sort=True)
-            H_prime = nx.Graph()
-
-            for u in U_prime:
-                if u not in list(H.nodes()):
-                    continue
-
-                for u_neighbor in H.neighbors(u):
-                    if u_neighbor not in W_prime:
-                        continue
-
-                    H_prime.add_nodes_from([u_neighbor], bipartite='W')
-                    H_prime.add_nodes_from([u], bipartite='U')
-                    H_prime.add_edge(u_neighbor, u)
-
-    color_dict = color_using_ordering(graph, V)
-
-    if color_dict is None:
-        print('Locally Connected: No 3-coloring possible!')
-        return None
+            w = next(iter(W))
+            W_prime, U_prime, H_prime = get_H_prime(graph, H, W, U, w)
 
     print('Locally Connected: 3-coloring possible')
     return color_dict | low_degree_coloring
@@ -1,134 +1,161 @@
+import itertools
+import os
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 import networkx as nx
-from tqdm import tqdm
 
+from graph_coloring.exceptions import InvalidGraphException
 from graph_coloring.generic.csp.list_sat import list_sat_satisfier
 from graph_coloring.misc import intersection, add_nodes_with_edges, remove_without_copy
-from graph_generation.graph_checker import GraphChecker
 
+# Neighborhoods in T_i larger than this are not enumerated, since that takes up to 3^n list reductions, so the options
+# of their components are only reduced by the list SAT at the end
+MAX_ENUMERATED_NEIGHBORS = 12
+# With fewer components to reduce, the round trip to the worker processes costs more than it saves
+MIN_POOLED_COMPONENTS = 16
 
-def find_crossing_edge(graph, path0, path1):
+
+def find_odd_cycle(graph, source_node):
     """
-    Find a crossing edge in two bfs tree paths.
-    :param graph: The BFS tree
-    :param path0: Path to node 0 of the offending edge
-    :param path1: Path to node 1 of the offending edge
-    :return: The nodes that are crossing the paths
+    Run a single BFS from the source node, recording parents and levels, and stop at the first edge between two
+    nodes on the same level. The odd cycle is then recovered by walking both parent chains up to their common ancestor.
+    :param graph: Graph to find an odd cycle in
+    :param source_node: Node to start the BFS from
+    :return: The nodes of the odd cycle in cyclic order, or None if the component of the source is bipartite
     """
-    for node0 in path0:
-        for node1 in path1:
-            if node0 in path1 and node1 in path0:
-                continue
+    level = {source_node: 0}
+    parent = {source_node: None}
+    queue = deque([source_node])
+    offending_edge = None
+
+    while queue and offending_edge is None:
+        node = queue.popleft()
+
+        for neighbor in graph.neighbors(node):
+            if neighbor not in level:
+                level[neighbor] = level[node] + 1
+                parent[neighbor] = node
+                queue.append(neighbor)
+            elif level[neighbor] == level[node]:
+                offending_edge = (node, neighbor)
+                break
+
+    if offending_edge is None:
+        return None
+
+    # Both endpoints are on the same level, so walk up in lockstep until the chains meet
+    path0 = [offending_edge[0]]
+    path1 = [offending_edge[1]]
+
+    while path0[-1] != path1[-1]:
+        path0.append(parent[path0[-1]])
+        path1.append(parent[path1[-1]])
 
-            if graph.has_edge(node0, node1):
-                return node0, node1
+    # path0 ends in the common ancestor, path1 leads back down to the other endpoint
+    path1.pop()
+    path1.reverse()
 
+    return path0 + path1
 
-def find_induced_cycle(graph, checker):
+
+def shortcut_chord(graph, cycle):
     """
-    Find and return an induced cycle of given size in the given graph.
-    :param graph: Graph to find an induced cycle in
-    :param checker:
-    :return: An induced cycle if it exists
+    Find a chord in the given odd cycle and return the odd cycle on one of its sides.
+    :param graph: Graph the cycle is in
+    :param cycle: Nodes of an odd cycle in cyclic order
+    :return: A shorter odd cycle in cyclic order, or None if the cycle has no chords
     """
-    print("P7C3: Running BFS")
-    source_node = list(graph.nodes)[0]
-    bfs_tree = nx.bfs_tree(graph, source_node)
-    bfs_layers = nx.bfs_layers(graph, source_node)
+    positions = {node: i for i, node in enumerate(cycle)}
+    last = len(cycle) - 1
 
-    print("P7C3: Checking offending edge")
-    coloring_dict = {}
-    for i, layer in enumerate(bfs_layers):
-        for node in layer:
-            if i % 2 == 0:
-                coloring_dict[node] = 'red'
-            else:
-                coloring_dict[node] = 'blue'
+    for i, node in enumerate(cycle):
+        for neighbor in graph.neighbors(node):
+            j = positions.get(neighbor)
 
-    offending_edge = checker.get_color_offending_edge(graph, coloring_dict)
+            # Only handle each chord once, from its lowest position, and skip the cycle edges themselves
+            if j is None or j <= i + 1 or (i == 0 and j == last):
+                continue
 
-    path0 = nx.shortest_path(bfs_tree, source_node, offending_edge[0])
-    path1 = nx.shortest_path(bfs_tree, source_node, offending_edge[1])
+            if (j - i + 1) % 2 == 1:
+                return cycle[i:j + 1]
 
-    node0, node1 = find_crossing_edge(graph, path0, path1)
+            return cycle[j:] + cycle[:i + 1]
 
-    cycle = []
+    return None
 
-    index0 = path0.index(node0)
-    index1 = path1.index(node1)
 
-    for cycle_node_index in range(index0, len(path0)):
-        cycle.append(path0[cycle_node_index])
+def find_induced_cycle(graph):
+    """
+    Find and return an induced odd cycle in the given graph, which in a (P7, C3)-free graph is either a C5 or a C7.
+    Uses a single BFS to find an odd cycle, and then shortcuts it via chords until it is induced.
+    :param graph: Graph to find an induced cycle in
+    :return: An induced odd cycle in cyclic order if it exists
+    """
+    print("P7C3: Running BFS")
+    source_node = next(iter(graph.nodes))
+    cycle = find_odd_cycle(graph, source_node)
+
+    if cycle is None:
+        return None
 
-    for cycle_node_index in range(index1, len(path1)):
-        cycle.append(path1[1 - cycle_node_index])
+    print("P7C3: Shortcutting chords")
+    shorter_cycle = shortcut_chord(graph, cycle)
 
-    induced_cycle = nx.induced_subgraph(graph, cycle)
-    assert nx.number_connected_components(induced_cycle) == 1
+    while shorter_cycle is not None:
+        cycle = shorter_cycle
+        shorter_cycle = shortcut_chord(graph, cycle)
 
     return cycle
 
 
-def get_T_from_graph(graph, c5):
+def get_cycle_neighbor_masks(graph, c5):
     """
-    Compute the sets T as defined in the paper from the cycle.
-    :param graph: Graph to compute the T sets from
+    Compute for every node outside the cycle a bitmask of the cycle positions it is adjacent to,
+    only looking at the neighborhoods of the cycle nodes.
+    :param graph: Graph containing the cycle
     :param c5: Induced 5 cycle
-    :return: The sets T_i of nodes with neighbors in c5, c_{i-1} and c_{i+1}
+    :return: Dict of node: bitmask, where bit i is set if the node is adjacent to c5[i]
     """
-    T = [[], [], [], [], []]
-
-    nodes_without_c5 = list(graph.nodes())
+    cycle_nodes = set(c5)
+    masks = {}
 
-    for node in c5:
-        nodes_without_c5.remove(node)
-
-    tqdm_nodes = tqdm(nodes_without_c5)
-    tqdm_nodes.set_description(desc="Looping over nodes for T", refresh=True)
+    for i, cycle_node in enumerate(c5):
+        for neighbor in graph.neighbors(cycle_node):
+            if neighbor in cycle_nodes:
+                continue
 
-    for i in range(5):
-        for node in tqdm_nodes:
-            neighbors = list(graph.neighbors(node))
-            cycle_vertices = [c5[(i - 1) % 5], c5[(i + 1) % 5]]
-            neighbors_in_cycle = intersection(neighbors, cycle_vertices)
-            # Sort them to make sure that there are no issues with indices
-            cycle_vertices.sort()
-            neighbors_in_cycle.sort()
+            masks[neighbor] = masks.get(neighbor, 0) | (1 << i)
 
-            if neighbors_in_cycle == cycle_vertices:
-                T[i].append(node)
+    return masks
 
-    return T
 
-
-def get_D_from_graph(graph, c5):
+def get_T_and_D_from_graph(graph, c5):
     """
-    Compute the sets D as defined in the paper from the cycle.
-    :param graph: Graph to compute the D sets from
+    Compute the sets T and D as defined in the paper from the cycle, in a single pass over the neighborhoods
+    of the cycle nodes.
+    :param graph: Graph to compute the T and D sets from
     :param c5: Induced 5 cycle
-    :return: The sets D_i of nodes with neighbor in c5, c_{i}
+    :return: The sets T_i of nodes with neighbors in c5, c_{i-1} and c_{i+1},
+    and the sets D_i of nodes with neighbor in c5, c_{i}
     """
+    T = [[], [], [], [], []]
     D = [[], [], [], [], []]
 
-    nodes_without_c5 = list(graph.nodes())
-
-    for node in c5:
-        nodes_without_c5.remove(node)
+    t_masks = [(1 << ((i - 1) % 5)) | (1 << ((i + 1) % 5)) for i in range(5)]
 
-    tqdm_nodes = tqdm(nodes_without_c5)
-    tqdm_nodes.set_description(desc="Looping over nodes for D", refresh=True)
+    for node, mask in get_cycle_neighbor_masks(graph, c5).items():
+        # Exactly one bit set, so the only neighbor in the cycle is c_i
+        if mask & (mask - 1) == 0:
+            D[mask.bit_length() - 1].append(node)
+            continue
 
-    for i in range(5):
-        for node in tqdm_nodes:
-            neighbors = list(graph.neighbors(node))
-            cycle_vertices = [c5[i]]
-            neighbors_in_cycle = intersection(neighbors, c5)
-
-            if neighbors_in_cycle == cycle_vertices:
-                D[i].append(node)
+        for i, t_mask in enumerate(t_masks):
+            if mask & t_mask == t_mask:
+                T[i].append(node)
 
-    return D
+    return T, D
 
 
 def remove_color_from_neighbors(graph, node, color_dict, color):
@@ -242,93 +269,241 @@ def split_w_and_rest(ccs):
     return w, rest
 
 
-def handle_trivial_w(graph, w, S, color_dict):
+def propagate_fixed_colors(graph, color_dict, nodes=None):
+    """
+    Remove the color of every node with a single list coloring option from the options of its neighbors,
+    and repeat this for every neighbor that ends up with a single option itself.
+    :param graph: Graph to propagate the colors in
+    :param color_dict: Dict containing the list coloring options of nodes
+    :param nodes: Nodes to start propagating from, all nodes if not given
+    :return: Whether all nodes still have at least one color option
+    """
+    if nodes is None:
+        nodes = graph.nodes
+
+    queue = deque(node for node in nodes if len(color_dict[node]) == 1)
+
+    while queue:
+        node = queue.popleft()
+        fixed_color = color_dict[node][0]
+
+        for neighbor in graph.neighbors(node):
+            if fixed_color not in color_dict[neighbor]:
+                continue
+
+            color_dict[neighbor].remove(fixed_color)
+
+            if len(color_dict[neighbor]) == 0:
+                return False
+
+            if len(color_dict[neighbor]) == 1:
+                queue.append(neighbor)
+
+    return True
+
+
+def handle_trivial_w(graph, w, color_dict):
     """
     Assign or remove colors to the given isolated node.
     :param graph: Graph to check for neighbors of w
     :param w: An isolated node
-    :param S: List of nodes of c5, T, and D
     :param color_dict: Dict containing the list coloring options of nodes
     """
     w_neighbors = list(graph.neighbors(w))
-    w_s_intersection = intersection(w_neighbors, S)
+
+    # If a neighbor has a fixed color, remove that color from the allowed for w
+    for w_neighbor in w_neighbors:
+        if len(color_dict[w_neighbor]) == 1 and color_dict[w_neighbor][0] in color_dict[w]:
+            color_dict[w].remove(color_dict[w_neighbor][0])
 
     # If all neighbors are missing a color, w can take that color
-    for color in ['red', 'green', 'blue']:
-        if all(color not in color_dict[w_s] for w_s in w_s_intersection):
+    for color in color_dict[w]:
+        if all(color not in color_dict[w_neighbor] for w_neighbor in w_neighbors):
             color_dict[w] = [color]
             return
 
-    # If a neighbor has a fixed color, remove that color from the allowed for w
-    for w_s in w_s_intersection:
-        if len(color_dict[w_s]) == 1:
-            fixed_color = color_dict[w_s][0]
-            color_dict[w].remove(fixed_color)
-            break
 
-    assert False
+def get_neighborhood_signature(component, neighbors_in_t, color_dict):
+    """
+    Get the signature of a connected component and its neighbors in T_i, which fully determines the outcome of the
+    list reduction of that component.
+    :param component: Nodes of the connected component
+    :param neighbors_in_t: Neighbors of the connected component in T_i
+    :param color_dict: Dict containing the list coloring options of nodes
+    :return: Hashable signature of the component
+    """
+    return frozenset((node, tuple(color_dict[node])) for node in list(component) + neighbors_in_t)
+
+
+def reduce_component_lists(component_graph, neighbors_in_t, lists):
+    """
+    Enumerate all colorings of the neighbors of a connected component in T_i, and reduce the list coloring options of
+    the component under each of them. Options that are not possible under any of the colorings are removed.
+    :param component_graph: Graph induced on the connected component and its neighbors in T_i
+    :param neighbors_in_t: Neighbors of the connected component in T_i
+    :param lists: Dict containing the list coloring options of the nodes in the component graph
+    :return: Dict containing the reduced list coloring options, empty lists if no coloring is possible
+    """
+    possible_colors = {node: set() for node in lists}
+
+    for t_colors in itertools.product(*[lists[t] for t in neighbors_in_t]):
+        branch_lists = {node: list(colors) for node, colors in lists.items()}
+
+        for t, t_color in zip(neighbors_in_t, t_colors):
+            branch_lists[t] = [t_color]
+
+        if not propagate_fixed_colors(component_graph, branch_lists, neighbors_in_t):
+            continue
+
+        for node, colors in branch_lists.items():
+            possible_colors[node].update(colors)
+
+    return {node: [color for color in colors if color in possible_colors[node]] for node, colors in lists.items()}
 
 
-def handle_ccs(graph, W, T, D, S, ccs_without_s_without_w, color_dict):
+def handle_components(graph, ccs, t, color_dict, component_cache, executor):
+    """
+    Reduce the list coloring options of all connected components that have neighbors in the given T_i.
+    The components are independent, so when there are enough of them they are reduced in the worker pool of the
+    solve, and the result of each component is cached by its neighborhood signature.
+    :param graph: Graph to color in
+    :param ccs: List of connected components
+    :param t: The T_i set given
+    :param color_dict: Dict containing the list coloring options of nodes
+    :param component_cache: Dict of neighborhood signature: reduced list coloring options
+    :param executor: Process pool of the whole solve, used when there are enough components to reduce
+    :return: Whether all nodes still have at least one color option
+    """
+    signatures = []
+    tasks = []
+    skipped_components = 0
+
+    for cc, neighbors_in_t in get_neighbors_in_t_of_ccs(graph, ccs, t):
+        if len(neighbors_in_t) == 0:
+            continue
+
+        # Enumerating all colorings of a too large neighborhood is not feasible, so leave these options as they are
+        if len(neighbors_in_t) > MAX_ENUMERATED_NEIGHBORS:
+            skipped_components += 1
+            continue
+
+        signature = get_neighborhood_signature(cc, neighbors_in_t, color_dict)
+        signatures.append(signature)
+
+        if signature in component_cache:
+            continue
+
+        component_nodes = list(cc) + neighbors_in_t
+        lists = {node: color_dict[node].copy() for node in component_nodes}
+        tasks.append((signature, nx.Graph(nx.induced_subgraph(graph, component_nodes)), neighbors_in_t, lists))
+
+    if skipped_components > 0:
+        print(f"P7C3: {skipped_components} components have more than {MAX_ENUMERATED_NEIGHBORS} neighbors in T_i, "
+              "leaving their options to the list SAT...")
+
+    if len(tasks) >= MIN_POOLED_COMPONENTS:
+        # Sending every small component on its own costs more than reducing it, so send them in chunks
+        chunk_size = max(1, len(tasks) // (4 * (os.cpu_count() or 1)))
+        reduced = executor.map(reduce_component_lists, *list(zip(*tasks))[1:], chunksize=chunk_size)
+        component_cache.update(zip([task[0] for task in tasks], reduced))
+    else:
+        for signature, component_graph, neighbors_in_t, lists in tasks:
+            component_cache[signature] = reduce_component_lists(component_graph, neighbors_in_t, lists)
+
+    changed_nodes = []
+
+    for signature in signatures:
+        for node, colors in component_cache[signature].items():
+            if len(colors) == 0:
+                return False
+
+            # Components can share neighbors in T_i, so only ever remove options
+            reduced_colors = [color for color in color_dict[node] if color in colors]
+
+            if len(reduced_colors) == 0:
+                return False
+
+            if len(reduced_colors) < len(color_dict[node]):
+                color_dict[node] = reduced_colors
+                changed_nodes.append(node)
+
+    return propagate_fixed_colors(graph, color_dict, changed_nodes)
+
+
+def handle_ccs(graph, W, T, D, ccs_without_s_without_w, color_dict, component_cache, executor):
     """
     Handle the coloring of the connected components.
     :param graph: Graph to color in
     :param W: List of isolated nodes
     :param T: The sets T_i of nodes with neighbors in c5, c_{i-1} and c_{i+1}
     :param D: The sets D_i of nodes with neighbor in c5, c_{i}
-    :param S: List of nodes of c5, T, and D
     :param ccs_without_s_without_w: Leftover connected components after removing S and W
     :param color_dict: Dict containing the list coloring options of nodes
+    :param component_cache: Dict of neighborhood signature: reduced list coloring options
+    :param executor: Process pool of the whole solve, used when there are enough components to reduce
+    :return: Whether all nodes still have at least one color option
     """
     for i in [1, 2]:
-        handle_w_di(graph, W, T, D, S, i, color_dict)
-        handle_G_without_S(graph, ccs_without_s_without_w, T, i, color_dict)
+        if not handle_w_di(graph, W, T, D, i, color_dict, component_cache, executor):
+            return False
 
+        if not handle_G_without_S(graph, ccs_without_s_without_w, T, i, color_dict, component_cache, executor):
+            return False
 
-def handle_w_di(graph, W, T, D, S, i, color_dict):
+    return True
+
+
+def handle_w_di(graph, W, T, D, i, color_dict, component_cache, executor):
     """
-    TODO implement fully
+    Handle the connected components of W ∪ D_i, the trivial components directly, and the non-trivial components by
+    enumerating the colorings of their neighbors in T_i.
     :param graph: Graph to color in
     :param W: List of isolated nodes
     :param T: The sets T_i of nodes with neighbors in c5, c_{i-1} and c_{i+1}
     :param D: The sets D_i of nodes with neighbor in c5, c_{i}
-    :param S: List of nodes of c5, T, and D
     :param i: Which D_i and T_i to use
     :param color_dict: Dict containing the list coloring options of nodes
+    :param component_cache: Dict of neighborhood signature: reduced list coloring options
+    :param executor: Process pool of the whole solve, used when there are enough components to reduce
+    :return: Whether all nodes still have at least one color option
     """
     w_di = W + D[i]
     graph_w_di = nx.induced_subgraph(graph, w_di)
 
     ccs_graph_w_di = list(nx.connected_components(graph_w_di))
-    ccs_with_num_t_neighbors_w_di = get_neighbors_in_t_of_ccs(graph, ccs_graph_w_di, T[i])
+    non_trivial_ccs = []
 
-    for cc in ccs_with_num_t_neighbors_w_di:
+    for cc in ccs_graph_w_di:
         # Isolated vertex, and thus a trivial cc
-        if len(cc[0]) == 1:
-            isolated_vertex = list(cc[0])[0]
+        if len(cc) == 1:
+            isolated_vertex = list(cc)[0]
 
             if isolated_vertex in W:
                 W.remove(isolated_vertex)
 
-            handle_trivial_w(graph, isolated_vertex, S, color_dict)
+            handle_trivial_w(graph, isolated_vertex, color_dict)
         else:
-            assert False
+            non_trivial_ccs.append(cc)
 
+    if not propagate_fixed_colors(graph, color_dict, w_di):
+        return False
 
-def handle_G_without_S(graph, ccs_without_s_without_w, T, i, color_dict):
+    return handle_components(graph, non_trivial_ccs, T[i], color_dict, component_cache, executor)
+
+
+def handle_G_without_S(graph, ccs_without_s_without_w, T, i, color_dict, component_cache, executor):
     """
-    TODO implement fully
+    Handle the non-trivial connected components of G without S, by enumerating the colorings of their neighbors in T_i.
     :param graph: Graph to color in
     :param ccs_without_s_without_w: Leftover connected components after removing S and W
     :param T: The sets T_i of nodes with neighbors in c5, c_{i-1} and c_{i+1}
     :param i: Which T_i to use
     :param color_dict: Dict containing the list coloring options of nodes
+    :param component_cache: Dict of neighborhood signature: reduced list coloring options
+    :param executor: Process pool of the whole solve, used when there are enough components to reduce
+    :return: Whether all nodes still have at least one color option
     """
-    ccs_with_num_t_neighbors_s = get_neighbors_in_t_of_ccs(graph, ccs_without_s_without_w, T[i])
-
-    ccs_with_neighbors = [cc for cc in ccs_with_num_t_neighbors_s if len(cc[1]) > 0]
-    if len(ccs_with_neighbors) > 0:
-        assert False
+    return handle_components(graph, ccs_without_s_without_w, T[i], color_dict, component_cache, executor)
 
 
 def color_remaining_nodes(graph, color_dict):
@@ -352,9 +527,47 @@ def color_remaining_nodes(graph, color_dict):
     color_dict_options = {key: color_dict[key] for key in nodes_with_options}
 
     colors = list_sat_satisfier(graph_with_options, color_dict_options)
+
+    if colors is None:
+        return None
+
     return colors | color_dict_without_options
 
 
+def color_using_cycle(graph, c5, T, D, W, ccs_without_s_without_w, component_cache, executor):
+    """
+    Try to color the graph with the given fixed coloring of the induced 5 cycle.
+    :param graph: Graph to color in
+    :param c5: The induced 5 cycle
+    :param T: The sets T_i of nodes with neighbors in c5, c_{i-1} and c_{i+1}
+    :param D: The sets D_i of nodes with neighbor in c5, c_{i}
+    :param W: List of isolated nodes
+    :param ccs_without_s_without_w: Leftover connected components after removing S and W
+    :param component_cache: Dict of neighborhood signature: reduced list coloring options
+    :param executor: Process pool of the whole solve, used when there are enough components to reduce
+    :return: Dict of the assigned colors for all nodes, or None
+    """
+    color_dict = init_color_dict(graph, c5, T, D)
+
+    if not propagate_fixed_colors(graph, color_dict):
+        return None
+
+    if not handle_ccs(graph, W, T, D, ccs_without_s_without_w, color_dict, component_cache, executor):
+        return None
+
+    # Leftover W
+    for w in W:
+        handle_trivial_w(graph, w, color_dict)
+
+    if not propagate_fixed_colors(graph, color_dict, W):
+        return None
+
+    if any(len(list_colors) == 0 for list_colors in color_dict.values()):
+        return None
+
+    return color_remaining_nodes(graph, color_dict)
+
+
 def color_bipartite(graph):
     """
     Quickly and greedily color a bipartite graph.
@@ -392,19 +605,20 @@ def p7_c3_solve(graph: nx.Graph):
     print("P7C3: Finding cycle...")
     start_time = time.time()
 
-    checker = GraphChecker()
-    c5 = find_induced_cycle(graph, checker)
+    c5 = find_induced_cycle(graph)
 
     total_time = time.time() - start_time
     print(f"Finding cycle {c5} took {total_time} seconds\n")
 
     if c5 is None:
-        # TODO handle this case where we must have a C7
-        assert False
+        raise InvalidGraphException('P7C3: no odd cycle found in a graph that is not bipartite...')
+
+    if len(c5) != 5:
+        # The other induced odd cycle a (P7, C3)-free graph can have is a C7, which is a separate case of the paper
+        raise NotImplementedError(f'P7C3: found an induced C{len(c5)} instead of a C5, which is not supported yet...')
 
     print("P7C3: Getting T and D...")
-    T = get_T_from_graph(graph, c5)
-    D = get_D_from_graph(graph, c5)
+    T, D = get_T_and_D_from_graph(graph, c5)
     S = []
     S.extend(c5)
     for t_i in T:
@@ -415,27 +629,26 @@ def p7_c3_solve(graph: nx.Graph):
     # Make sure we only get the unique vertices
     S = list(set(S))
 
-    print("P7C3: Initial coloring...")
-    color_dict = init_color_dict(graph, c5, T, D)
-
     print("P7C3: Splitting ccs...")
     graph_without_s, removed_edges = remove_without_copy(graph, S)
     ccs_graph_without_s = list(nx.connected_components(graph_without_s))
     W, ccs_without_s_without_w = split_w_and_rest(ccs_graph_without_s)
     add_nodes_with_edges(graph, removed_edges)
 
-    print("P7C3: Handling ccs...")
-    handle_ccs(graph, W, T, D, S, ccs_without_s_without_w, color_dict)
-
-    # Leftover W
-    for w in W:
-        handle_trivial_w(graph, w, S, color_dict)
+    component_cache = {}
 
-    for _, list_colors in color_dict.items():
-        assert len(list_colors) <= 2
+    # One pool for all rotations, its worker processes are only started once components are sent to it
+    with ProcessPoolExecutor() as executor:
+        # The coloring of the cycle is unique up to the position of the color used only once, so try all rotations
+        for rotation in range(5):
+            print(f"P7C3: Coloring with cycle rotation {rotation}...")
+            colors = color_using_cycle(graph, c5[rotation:] + c5[:rotation], T[rotation:] + T[:rotation],
+                                       D[rotation:] + D[:rotation], W.copy(), ccs_without_s_without_w,
+                                       component_cache, executor)
 
-    colors = color_remaining_nodes(graph, color_dict)
+            if colors is not None:
+                print('P7C3: 3-coloring found...')
+                return colors
 
-    # TODO enumerate colorings for the connected components that have more than one neighbor in a T[i]
-    # TODO get non-trivial components and remove colors
-    return colors
+    print('P7C3: No 3-coloring possible!')
+    return None
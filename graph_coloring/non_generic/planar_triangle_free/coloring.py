@@ -1,166 +1,91 @@
-from graph_coloring.misc import intersection
+from graph_coloring.exceptions import InvalidColoringException
+from graph_coloring.non_generic.planar_triangle_free.union_find import UnionFind
+from graph_generation.graph_checker import GraphChecker
 
-
-def remove_neighbors_colors_from_allowed(neighbor, color_dict, allowed_colors):
-    """
-    Remove the color of the given neighbor from the given allowed colors list.
-    :param neighbor: Node representing the neighbor
-    :param color_dict: Dict containing fixed node: color pairs
-    :param allowed_colors: List of allowed colors
-    """
-    neighbor_color = color_dict[neighbor]
-    if neighbor_color in allowed_colors:
-        allowed_colors.remove(neighbor_color)
+COLORS = ['red', 'green', 'blue']
 
 
-def get_neighbors_coloring(neighbors, color_dict):
+def get_forbidden_colors(neighbors, union_find: UnionFind, color_indices):
     """
-    Remove already used colors by neighbors from the allowed colors.
-    :param neighbors: Node representing the neighbor
-    :param color_dict: Dict containing fixed node: color pairs
-    :return: List with allowed colors
+    Get the colors already used by the given neighbors as a bitmask. Neighbors that were identified into
+    another node afterwards use the color of the node they were identified into.
+    :param neighbors: Neighbors of a deleted node at the time it was deleted
+    :param union_find: Union-find recording the identified nodes
+    :param color_indices: Dict containing fixed node: color index pairs
+    :return: Bitmask of the forbidden colors
     """
-    allowed_colors = ['red', 'green', 'blue']
+    forbidden_colors = 0
 
     for neighbor in neighbors:
-        if neighbor in color_dict:
-            remove_neighbors_colors_from_allowed(neighbor, color_dict, allowed_colors)
+        color_index = color_indices.get(union_find.find(neighbor))
 
-    return allowed_colors
+        if color_index is not None:
+            forbidden_colors |= 1 << color_index
 
-
-def get_identified_nodes(node):
-    """
-    If this node contains a '_', it is the identified node of all v1 v3 pairs of
-    tetra and hexagrams it was involved in
-    So split it and get the neighbors of those nodes as well to avoid conflicting colors
-    If is a normal node it will just create a list of only that node
-    :param node:
-    :return:
-    """
-    return node.split('_')
+    return forbidden_colors
 
 
-def handle_node_coloring(node, graph, color_dict):
+def color_deleted_nodes(deleted_nodes, deleted_neighbors, union_find: UnionFind, color_indices):
     """
-    Color the given monogram, by checking its neighbors and greedily
-    getting an allowed color, and update the color dict.
-    :param node: Monogram to be colored
-    :param graph: Graph to check neighbors in
-    :param color_dict: Dict containing fixed node: color pairs
+    Color the nodes deleted by a single reduction, by trying all colorings of the at most 5 nodes
+    against the colors of their neighbors at the time they were deleted.
+    :param deleted_nodes: The nodes deleted by the reduction
+    :param deleted_neighbors: Dict of node: neighbors at the time the reduction deleted it
+    :param union_find: Union-find recording the identified nodes
+    :param color_indices: Dict containing fixed node: color index pairs, updated with the deleted nodes
+    :raises InvalidColoringException: If the deleted nodes can not be colored
     """
-    identified_nodes = get_identified_nodes(node)
-    neighbors = []
-    for identified_node in identified_nodes:
-        neighbors.extend(graph.neighbors(identified_node))
+    forbidden_colors = [get_forbidden_colors(deleted_neighbors[node], union_find, color_indices)
+                        for node in deleted_nodes]
+    node_indices = {node: i for i, node in enumerate(deleted_nodes)}
+    # Edges between the deleted nodes, to earlier nodes only, so they are colored when they are needed
+    earlier_neighbors = [[node_indices[neighbor] for neighbor in deleted_neighbors[node]
+                          if node_indices.get(neighbor, len(deleted_nodes)) < i]
+                         for i, node in enumerate(deleted_nodes)]
+    assigned = []
 
-    allowed_colors = get_neighbors_coloring(neighbors, color_dict)
+    def assign(i):
+        if i == len(deleted_nodes):
+            return True
 
-    for identified_node in identified_nodes:
-        color_dict[identified_node] = allowed_colors[0]
+        used_colors = forbidden_colors[i]
+        for j in earlier_neighbors[i]:
+            used_colors |= 1 << assigned[j]
 
+        for color_index in range(len(COLORS)):
+            if not used_colors >> color_index & 1:
+                assigned.append(color_index)
 
-def handle_identified_node_coloring(multigram, color_dict):
-    """
-    Color the given tetra- or hexagram, and update the color dict.
-    :param multigram: Tetra- or hexagram to be colored
-    :param color_dict: Dict containing fixed node: color pairs
-    """
-    v_1 = multigram[0][0]
-    v_3 = multigram[0][2]
-    identified_nodes = get_identified_nodes(v_1)
+                if assign(i + 1):
+                    return True
 
-    color_dict[v_3] = color_dict[identified_nodes[0]]
+                assigned.pop()
 
+        return False
 
-def get_allowed_colors(node, graph, color_dict):
-    """
-    Get the colors the given node can still be colored.
-    :param node: Node to get allowed colors for
-    :param graph: Graph to check the neighbors in
-    :param color_dict: Dict containing the allowed colors of all nodes
-    :return: List of colors that the given node can be colored
-    """
-    identified_nodes = get_identified_nodes(node)
-    neighbors = graph.neighbors(identified_nodes[0])
-    return get_neighbors_coloring(neighbors, color_dict)
+    if not assign(0):
+        raise InvalidColoringException('Planar Triangle-free: could not extend the coloring to the deleted nodes...')
 
-
-def handle_v1_to_v4_coloring(multigram, graph, color_dict):
-    """
-    Color the given octagram or pentagram (all multigrams where v1 to v4 are reduced),
-    and update the color dict.
-    :param multigram: Octagram or pentagram to be colored
-    :param graph: Graph to check neighbors in
-    :param color_dict: Dict containing fixed node: color pairs
-    """
-    for i in range(2):
-        # If the opposite nodes can use the same color, do so, because their neighbors might
-        # not have any colors remaining otherwise
-        node = multigram[0][i]
-        opposite_node = multigram[0][i + 2 % 4]
-        identified_node = get_identified_nodes(node)[0]
-        identified_opposite_node = get_identified_nodes(opposite_node)[0]
-        allowed_colors_node = get_allowed_colors(identified_node, graph, color_dict)
-        allowed_colors_opposite_node = get_allowed_colors(identified_opposite_node, graph, color_dict)
-
-        same_allowed_colors = intersection(allowed_colors_node, allowed_colors_opposite_node)
-
-        if len(same_allowed_colors) == 0:
-            color_dict[identified_node] = allowed_colors_node[0]
-            color_dict[identified_opposite_node] = allowed_colors_opposite_node[0]
-        else:
-            color_dict[identified_node] = same_allowed_colors[0]
-            color_dict[identified_opposite_node] = same_allowed_colors[0]
-
-
-def handle_decagram_coloring(multigram, graph, color_dict):
-    """
-    Color decagram greedily.
-    :param multigram: Decagram to color
-    :param graph: Graph to get allowed colors in
-    :param color_dict: Dict containing fixed node: color pairs
-    """
-    for node in multigram:
-        allowed_colors = get_allowed_colors(node, graph, color_dict)
-        identified_node = get_identified_nodes(node)[0]
-        color_dict[identified_node] = allowed_colors[0]
+    for node, color_index in zip(deleted_nodes, assigned):
+        color_indices[node] = color_index
 
 
-def handle_multigram_coloring(multigram, graph, color_dict):
+def convert_reduction_log_into_coloring(reduction_log, graph, union_find: UnionFind):
     """
-    Color the graph using the given multigram.
-    :param multigram: Multigram to be colored
-    :param graph: Graph to check neighbors in
-    :param color_dict: Dict containing fixed node: color pairs
-    """
-    match multigram[1]:
-        case 'monogram':
-            handle_node_coloring(multigram[0][0], graph, color_dict)
-        case 'tetragram':
-            handle_identified_node_coloring(multigram, color_dict)
-        case 'octagram':
-            handle_v1_to_v4_coloring(multigram, graph, color_dict)
-        case 'pentagram':
-            handle_v1_to_v4_coloring(multigram, graph, color_dict)
-        case 'decagram':
-            handle_decagram_coloring(multigram, graph, color_dict)
-        case 'hexagram':
-            handle_identified_node_coloring(multigram, color_dict)
-
-
-def convert_multigrams_into_coloring(multigrams, graph):
-    """
-    Greedily color all multigrams, starting with the last added.
-    :param multigrams: List of multigrams
-    :param graph: Graph to check neighbors in
+    Color all deleted nodes, starting with the last deleted, and give the identified nodes the color of
+    the node they were identified into.
+    :param reduction_log: List of deleted nodes and their neighbors at the time of deletion, in order of deletion
+    :param graph: The original graph
+    :param union_find: Union-find recording the identified nodes
     :return: Dict of node: color pairs
     """
-    color_dict = {}
-    reverse_multigrams = multigrams.copy()
-    reverse_multigrams.reverse()
+    color_indices = {}
+
+    for deleted_nodes, deleted_neighbors in reversed(reduction_log):
+        color_deleted_nodes(deleted_nodes, deleted_neighbors, union_find, color_indices)
+
+    color_dict = {node: COLORS[color_indices[union_find.find(node)]] for node in graph.nodes}
 
-    for multigram in reverse_multigrams:
-        handle_multigram_coloring(multigram, graph, color_dict)
+    GraphChecker.valid_3_coloring(graph, color_dict)
 
     return color_dict
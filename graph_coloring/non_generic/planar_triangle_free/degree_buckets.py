@@ -0,0 +1,60 @@
+from collections import defaultdict
+
+import networkx as nx
+
+
+class DegreeBuckets:
+    """Class keeping the nodes of a graph in buckets by their degree, to get low degree nodes without a full scan."""
+    buckets: defaultdict
+    node_degree: dict
+
+    def __init__(self, graph: nx.Graph):
+        # Dicts are used as insertion ordered sets, so the same node is picked on every run
+        self.buckets = defaultdict(dict)
+        self.node_degree = {}
+
+        for node, degree in graph.degree:
+            self.buckets[degree][node] = None
+            self.node_degree[node] = degree
+
+    def update(self, graph, nodes):
+        """
+        Move the given nodes to the bucket of their current degree, and drop the ones no longer in the graph.
+        :param graph: The graph to get the degrees from
+        :param nodes: The nodes whose degree might have changed
+        """
+        for node in nodes:
+            old_degree = self.node_degree.pop(node, None)
+
+            if old_degree is not None:
+                del self.buckets[old_degree][node]
+
+            if node in graph:
+                degree = graph.degree[node]
+                self.buckets[degree][node] = None
+                self.node_degree[node] = degree
+
+    def remove(self, nodes):
+        """
+        Remove the given nodes from their buckets.
+        :param nodes: The nodes to be removed
+        """
+        for node in nodes:
+            old_degree = self.node_degree.pop(node, None)
+
+            if old_degree is not None:
+                del self.buckets[old_degree][node]
+
+    def get_vertex_up_to(self, n):
+        """
+        Get a node of degree at most n.
+        :param n: The maximum degree
+        :return: A node of degree at most n, or None if there is none
+        """
+        for degree in range(n + 1):
+            bucket = self.buckets.get(degree)
+
+            if bucket:
+                return next(iter(bucket))
+
+        return None
@@ -0,0 +1,486 @@
+import networkx as nx
+
+try:
+    import planarity
+except ImportError:
+    planarity = None
+
+
+class HalfEdgeEmbedding:
+    """Class representing a planar embedding as half-edge arrays, which can be updated locally."""
+    origin: list
+    cw: list
+    ccw: list
+    first: dict
+    degree: dict
+    touched: set
+
+    def __init__(self):
+        # Half-edge h and its twin h ^ 1 together form an edge, cw and ccw give the next half-edge around the origin
+        self.origin = []
+        self.cw = []
+        self.ccw = []
+        self.first = {}
+        self.degree = {}
+        # Nodes whose rotation changed since the last call to pop_touched
+        self.touched = set()
+
+    @staticmethod
+    def from_rotation_system(rotation_system):
+        """
+        Create the half-edge arrays from a rotation system.
+        :param rotation_system: Dict of node: list of neighbors in clockwise order
+        :return: HalfEdgeEmbedding with the given rotation system
+        """
+        embedding = HalfEdgeEmbedding()
+        half_edges = {}
+
+        for node in rotation_system:
+            embedding.add_node(node)
+
+        for node, neighbors in rotation_system.items():
+            for neighbor in neighbors:
+                if (node, neighbor) not in half_edges:
+                    h = embedding.new_edge(node, neighbor)
+                    half_edges[(node, neighbor)] = h
+                    half_edges[(neighbor, node)] = h ^ 1
+
+        for node, neighbors in rotation_system.items():
+            embedding.set_rotation(node, [half_edges[(node, neighbor)] for neighbor in neighbors])
+
+        return embedding
+
+    @staticmethod
+    def from_planar_embedding(planar_embedding: nx.PlanarEmbedding):
+        """
+        Create the half-edge arrays from a networkx planar embedding.
+        :param planar_embedding: The planar embedding to convert
+        :return: HalfEdgeEmbedding with the same rotation system
+        """
+        return HalfEdgeEmbedding.from_rotation_system({node: list(planar_embedding.neighbors_cw_order(node))
+                                                       for node in planar_embedding.nodes})
+
+    def add_node(self, node):
+        """
+        Add a node without any edges to the embedding.
+        :param node: Node to be added
+        """
+        self.first[node] = None
+        self.degree[node] = 0
+
+    def new_edge(self, u, v):
+        """
+        Allocate the two half-edges of the edge between u and v, without placing them in a rotation.
+        :param u: Origin of the returned half-edge
+        :param v: Origin of the twin half-edge
+        :return: The half-edge from u to v
+        """
+        h = len(self.origin)
+        self.origin.extend([u, v])
+        self.cw.extend([h, h + 1])
+        self.ccw.extend([h, h + 1])
+        return h
+
+    def set_rotation(self, node, rotation):
+        """
+        Set the clockwise order of the half-edges leaving the given node.
+        :param node: Node to set the rotation for
+        :param rotation: List of half-edges leaving the node in clockwise order
+        """
+        for i, h in enumerate(rotation):
+            self.cw[h] = rotation[(i + 1) % len(rotation)]
+            self.ccw[h] = rotation[i - 1]
+
+        self.first[node] = rotation[0] if len(rotation) > 0 else None
+        self.degree[node] = len(rotation)
+
+    def head(self, h):
+        """
+        Get the node the given half-edge points to.
+        :param h: The half-edge
+        :return: The node at the end of the half-edge
+        """
+        return self.origin[h ^ 1]
+
+    def half_edges(self, node):
+        """
+        Get the half-edges leaving the given node in clockwise order.
+        :param node: Node to get the half-edges for
+        :return: List of half-edges
+        """
+        start = self.first[node]
+
+        if start is None:
+            return []
+
+        rotation = [start]
+        h = self.cw[start]
+
+        while h != start:
+            rotation.append(h)
+            h = self.cw[h]
+
+        return rotation
+
+    def neighbors_cw_order(self, node):
+        """
+        Get the neighbors of the given node in clockwise order.
+        :param node: Node to get the neighbors for
+        :return: List of neighbors
+        """
+        return [self.head(h) for h in self.half_edges(node)]
+
+    def get_half_edge(self, u, v):
+        """
+        Get the half-edge from u to v.
+        :param u: Origin of the half-edge
+        :param v: Head of the half-edge
+        :return: The half-edge, or None if u and v are not adjacent
+        """
+        for h in self.half_edges(u):
+            if self.head(h) == v:
+                return h
+
+        return None
+
+    def next_face_half_edge(self, h):
+        """
+        Get the half-edge following the given one on the face to its right.
+        :param h: The half-edge
+        :return: The next half-edge on the face
+        """
+        return self.ccw[h ^ 1]
+
+    def traverse_face(self, h, max_length=None):
+        """
+        Get the half-edges of the face to the right of the given half-edge.
+        :param h: Half-edge to start the traversal from
+        :param max_length: Stop traversing after this many half-edges
+        :return: List of half-edges of the face, or None if the face is longer than max_length
+        """
+        face = [h]
+        current = self.next_face_half_edge(h)
+
+        while current != h:
+            if max_length is not None and len(face) >= max_length:
+                return None
+
+            face.append(current)
+            current = self.next_face_half_edge(current)
+
+        return face
+
+    def insert_half_edge_cw(self, h, reference):
+        """
+        Insert the given half-edge in the rotation of its origin, directly clockwise of the reference half-edge.
+        :param h: Half-edge to be inserted
+        :param reference: Half-edge leaving the same node, or None if the node has no edges yet
+        """
+        node = self.origin[h]
+        self.degree[node] += 1
+        self.touched.add(node)
+
+        if reference is None:
+            self.cw[h] = h
+            self.ccw[h] = h
+            self.first[node] = h
+            return
+
+        after = self.cw[reference]
+        self.cw[reference] = h
+        self.ccw[h] = reference
+        self.cw[h] = after
+        self.ccw[after] = h
+
+    def unlink_half_edge(self, h):
+        """
+        Remove the given half-edge from the rotation of its origin.
+        :param h: Half-edge to be removed
+        """
+        node = self.origin[h]
+        self.degree[node] -= 1
+        self.touched.add(node)
+        # Unlinked half-edges keep their arrays slot, but no longer have an origin
+        self.origin[h] = None
+
+        if self.cw[h] == h:
+            self.first[node] = None
+            return
+
+        self.cw[self.ccw[h]] = self.cw[h]
+        self.ccw[self.cw[h]] = self.ccw[h]
+
+        if self.first[node] == h:
+            self.first[node] = self.cw[h]
+
+    def add_edge(self, u_corner, v_corner):
+        """
+        Add an edge between the origins of two half-edges on the same face, inside that face.
+        :param u_corner: Half-edge leaving u on the face, the edge is placed directly clockwise of it
+        :param v_corner: Half-edge leaving v on the face, the edge is placed directly clockwise of it
+        :return: The half-edge from u to v
+        """
+        h = self.new_edge(self.origin[u_corner], self.origin[v_corner])
+        self.insert_half_edge_cw(h, u_corner)
+        self.insert_half_edge_cw(h ^ 1, v_corner)
+        return h
+
+    def remove_edge(self, h):
+        """
+        Remove the edge of the given half-edge, merging the faces on both sides.
+        :param h: One of the half-edges of the edge
+        """
+        self.unlink_half_edge(h)
+        self.unlink_half_edge(h ^ 1)
+
+    def remove_node(self, node):
+        """
+        Remove the given node and all its edges, merging all faces around it.
+        :param node: Node to be removed
+        """
+        for h in self.half_edges(node):
+            self.unlink_half_edge(h ^ 1)
+            self.origin[h] = None
+
+        del self.first[node]
+        del self.degree[node]
+        self.touched.discard(node)
+
+    def get_corner_after_removal(self, h, removed_nodes):
+        """
+        Get the half-edge that will leave the origin of h on the merged face, after the given nodes are removed.
+        :param h: Half-edge from a remaining node to a node that will be removed
+        :param removed_nodes: Nodes that will be removed
+        :return: The first half-edge counterclockwise of h that remains, or None if no half-edge remains
+        """
+        current = self.ccw[h]
+
+        while current != h:
+            if self.head(current) not in removed_nodes:
+                return current
+
+            current = self.ccw[current]
+
+        return None
+
+    def identify(self, a, b, a_corner, b_corner):
+        """
+        Identify the nodes a and b through a face they both lie on. The node b is merged into a, and the parallel
+        edges and self-loops this creates are removed.
+        :param a: The node that remains
+        :param b: The node that is merged into a
+        :param a_corner: Half-edge leaving a on the face, or None if a has no edges
+        :param b_corner: Half-edge leaving b on the face, or None if b has no edges
+        :return: List of other nodes that lost an edge, because it became parallel to another one
+        """
+        b_half_edges = self.half_edges(b)
+
+        for h in b_half_edges:
+            self.origin[h] = a
+
+        self.degree[a] += self.degree.pop(b)
+        del self.first[b]
+        self.touched.discard(b)
+        self.touched.add(a)
+
+        if a_corner is None:
+            self.first[a] = b_corner
+        elif b_corner is not None:
+            # Going counterclockwise, the merged rotation is a from its face corner back to the face, and then b
+            a_in = self.cw[a_corner]
+            b_in = self.cw[b_corner]
+            self.cw[b_corner] = a_in
+            self.ccw[a_in] = b_corner
+            self.cw[a_corner] = b_in
+            self.ccw[b_in] = a_corner
+
+        seen_neighbors = set()
+        removed = set()
+        lost_edge_nodes = []
+
+        for h in self.half_edges(a):
+            if h in removed:
+                continue
+
+            neighbor = self.head(h)
+
+            if neighbor != a and neighbor not in seen_neighbors:
+                seen_neighbors.add(neighbor)
+                continue
+
+            self.remove_edge(h)
+            removed.update([h, h ^ 1])
+
+            if neighbor != a:
+                lost_edge_nodes.append(neighbor)
+
+        return lost_edge_nodes
+
+    def is_alive(self, h):
+        """
+        Check whether the given half-edge is still part of the embedding.
+        :param h: The half-edge
+        :return: Whether the half-edge has not been removed
+        """
+        return self.origin[h] is not None
+
+    def pop_touched(self):
+        """
+        Get the remaining nodes whose rotation changed since the last call, and reset them.
+        :return: Set of touched nodes
+        """
+        touched = self.touched
+        self.touched = set()
+        return touched
+
+    def nodes(self):
+        """
+        Get all nodes in the embedding.
+        :return: List of nodes
+        """
+        return list(self.first)
+
+    def count_faces(self):
+        """
+        Count the faces of the embedding, where every connected component has its own outer face.
+        :return: The number of faces
+        """
+        visited = [False] * len(self.origin)
+        faces = 0
+
+        for node in self.first:
+            for h in self.half_edges(node):
+                if visited[h]:
+                    continue
+
+                faces += 1
+                for face_h in self.traverse_face(h):
+                    visited[face_h] = True
+
+        return faces
+
+    def is_planar(self):
+        """
+        Check with Euler's formula whether the rotation system is a planar embedding of its graph.
+        :return: Whether the embedding is planar
+        """
+        nodes = [node for node in self.first if self.degree[node] > 0]
+        edges = sum(self.degree[node] for node in nodes) // 2
+        components = nx.number_connected_components(nx.Graph((self.origin[h], self.head(h))
+                                                             for node in nodes for h in self.half_edges(node)))
+
+        return self.count_faces() == edges - len(nodes) + 2 * components
+
+    def to_planar_embedding(self):
+        """
+        Convert the half-edge arrays to a networkx planar embedding.
+        :return: nx.PlanarEmbedding with the same rotation system
+        """
+        planar_embedding = nx.PlanarEmbedding()
+        planar_embedding.add_nodes_from(self.first)
+        planar_embedding.set_data({node: self.neighbors_cw_order(node) for node in self.first})
+        return planar_embedding
+
+
+def get_planarity_graph(graph, capacity=None):
+    """
+    Copy the given graph into a graph of the compiled planarity extension, in memory.
+    :param graph: The graph to copy
+    :param capacity: Number of vertices to make room for, which can not be raised once there are edges, defaults to
+    the number of nodes
+    :return: The planarity graph, and dict of node: vertex index in the planarity graph
+    """
+    planarity_graph = planarity.Graph()
+    # The extension needs room for at least one vertex
+    planarity_graph.gp_EnsureVertexCapacity(max(graph.number_of_nodes(), capacity or 0, 1))
+    indices = {node: planarity_graph.gp_LowerBoundVertices() + i for i, node in enumerate(graph.nodes)}
+
+    for u, v in graph.edges:
+        planarity_graph.gp_DynamicAddEdge(indices[u], 0, indices[v], 0)
+
+    return planarity_graph, indices
+
+
+def get_embedded_rotation_system(planarity_graph, indices):
+    """
+    Read the rotation system of a planarity graph that was just embedded, whose adjacency lists are then in rotation
+    order. The embedder numbers the vertices in depth first order, so they are sorted back to the given indices first,
+    which must only be done once.
+    :param planarity_graph: The embedded planarity graph
+    :param indices: Dict of node: vertex index in the planarity graph
+    :return: Dict of node: list of neighbors in rotation order
+    """
+    planarity_graph.gp_SortVertices()
+    nodes = {index: node for node, index in indices.items()}
+    rotation_system = {}
+
+    # The writer of the extension reads the adjacency lists much faster than a call per edge, as "vertex: neighbors 0"
+    # lines after a header line
+    for line in planarity_graph.gp_WriteToString(planarity.WRITE_ADJLIST).splitlines()[1:]:
+        vertex, neighbors = line.split(':')
+
+        # Spare vertices have no node and no edges
+        if int(vertex) in nodes:
+            rotation_system[nodes[int(vertex)]] = [nodes[int(neighbor)] for neighbor in neighbors.split()[:-1]]
+
+    return rotation_system
+
+
+def get_planarity_rotation_system(graph):
+    """
+    Get a rotation system of the given graph from the compiled planarity extension.
+    :param graph: The graph to embed
+    :return: Dict of node: list of neighbors in rotation order, or None if the graph is not planar
+    """
+    planarity_graph, indices = get_planarity_graph(graph)
+
+    if planarity_graph.gp_Embed(planarity.EMBEDFLAGS_PLANAR) != planarity.OK:
+        return None
+
+    return get_embedded_rotation_system(planarity_graph, indices)
+
+
+def get_networkx_rotation_system(graph):
+    """
+    Get a rotation system of the given graph from the networkx planarity check.
+    :param graph: The graph to embed
+    :return: Dict of node: list of neighbors in clockwise order, or None if the graph is not planar
+    """
+    planar, planar_embedding = nx.check_planarity(graph)
+
+    if not planar:
+        return None
+
+    return {node: list(planar_embedding.neighbors_cw_order(node)) for node in planar_embedding.nodes}
+
+
+def get_half_edge_embedding(graph, use_planarity=True):
+    """
+    Get a planar embedding of the given graph as half-edge arrays. The rotation system is taken from the compiled
+    planarity extension when it is available, and from networkx otherwise.
+    :param graph: The graph to embed
+    :param use_planarity: Whether to try the planarity extension first
+    :return: HalfEdgeEmbedding of the graph, or None if the graph is not planar
+    """
+    if len(graph) == 0:
+        return HalfEdgeEmbedding.from_rotation_system({})
+
+    if use_planarity and planarity is not None:
+        rotation_system = get_planarity_rotation_system(graph)
+
+        if rotation_system is None:
+            return None
+
+        embedding = HalfEdgeEmbedding.from_rotation_system(rotation_system)
+
+        if embedding.is_planar():
+            return embedding
+
+        print('Planar Triangle-free: planarity embedding was not valid, falling back to networkx...')
+
+    rotation_system = get_networkx_rotation_system(graph)
+
+    if rotation_system is None:
+        return None
+
+    return HalfEdgeEmbedding.from_rotation_system(rotation_system)
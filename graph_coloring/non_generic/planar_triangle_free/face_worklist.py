@@ -0,0 +1,188 @@
+from collections import deque
+
+from graph_coloring.non_generic.planar_triangle_free.embedding import HalfEdgeEmbedding
+from graph_coloring.non_generic.planar_triangle_free.safety import check_multigram_safety
+
+# Safety only reads the edges between nodes within this distance of a multigram, since it looks at paths of length at
+# most 3 between face vertices or their distinct neighbors. Reducing a multigram only changes edges between nodes within
+# this distance of it, since it removes face vertices and identifies them with each other or with distinct neighbors.
+SAFETY_RADIUS = 2
+# The ends of changed edges that are not touched are removed nodes, or neighbors of a node that another one was merged
+# into, and both are next to a touched node. So the verdict of a face further than one more from every touched node can
+# not be changed by a reduction
+UPDATE_RADIUS = SAFETY_RADIUS + 1
+
+
+class FaceWorklist:
+    """Class keeping track of the faces that still have to be checked for a safe multigram."""
+    embedding: HalfEdgeEmbedding
+    checked: list
+    stamp: int
+    versions: dict
+    unexpanded: set
+    queue: deque
+    queued: set
+
+    def __init__(self, embedding: HalfEdgeEmbedding):
+        self.embedding = embedding
+        # Cached verdict per half-edge, the stamp at which the face to its right was checked, or -1 if it was not
+        self.checked = []
+        # Counts the updates, so verdicts and changes can be ordered
+        self.stamp = 0
+        # Stamp of the last update that touched a node
+        self.versions = {}
+        # Nodes touched since the last expansion
+        self.unexpanded = set()
+        self.queue = deque()
+        self.queued = set()
+
+        self.push_all()
+
+    def push(self, h):
+        """
+        Add the face of the given half-edge to the worklist, clearing its cached verdict.
+        :param h: Half-edge of the face
+        """
+        if h >= len(self.checked):
+            self.checked.extend([-1] * (len(self.embedding.origin) - len(self.checked)))
+
+        self.checked[h] = -1
+
+        if h not in self.queued:
+            self.queued.add(h)
+            self.queue.append(h)
+
+    def push_all(self):
+        """
+        Add all faces of the embedding to the worklist.
+        """
+        # Every verdict is cleared, so the touched nodes no longer have to be expanded
+        self.unexpanded = set()
+
+        for node in self.embedding.nodes():
+            for h in self.embedding.half_edges(node):
+                self.push(h)
+
+    def update(self, graph, touched_nodes):
+        """
+        Add the faces around the nodes touched by the last reduction to the worklist, since their facial walks changed.
+        The faces further away whose safety may change are only added by expand, when the worklist runs dry, so the
+        changes of many reductions are expanded at once.
+        :param graph: The reduced graph
+        :param touched_nodes: The nodes whose rotation was changed by the last reduction
+        """
+        self.stamp += 1
+
+        for node in touched_nodes:
+            if node not in graph:
+                continue
+
+            self.versions[node] = self.stamp
+            self.unexpanded.add(node)
+
+            for h in self.embedding.half_edges(node):
+                self.push(h)
+
+    def expand(self, graph):
+        """
+        Add the faces within UPDATE_RADIUS of the nodes touched since the last expansion to the worklist, unless they
+        were checked after the newest touch within that distance.
+        :param graph: The graph to search in
+        """
+        newest_versions = {}
+        remaining_radius = {}
+
+        # Newest touches first, so the first one that reaches a node is the newest one within the distance
+        for node in sorted(self.unexpanded, key=self.versions.get, reverse=True):
+            version = self.versions[node]
+
+            if node not in graph or remaining_radius.get(node, -1) >= UPDATE_RADIUS:
+                continue
+
+            newest_versions.setdefault(node, version)
+            remaining_radius[node] = UPDATE_RADIUS
+            frontier = [node]
+
+            # Nodes already reached with as much distance left are not searched from again
+            for radius in range(UPDATE_RADIUS - 1, -1, -1):
+                next_frontier = []
+
+                for frontier_node in frontier:
+                    for neighbor in graph.neighbors(frontier_node):
+                        if remaining_radius.get(neighbor, -1) < radius:
+                            remaining_radius[neighbor] = radius
+                            newest_versions.setdefault(neighbor, version)
+                            next_frontier.append(neighbor)
+
+                frontier = next_frontier
+
+        self.unexpanded = set()
+
+        for node, version in newest_versions.items():
+            for h in self.embedding.half_edges(node):
+                # Faces that are not checked yet are still in the worklist, new half-edges have no verdict yet
+                if h >= len(self.checked) or 0 <= self.checked[h] < version:
+                    self.push(h)
+
+    def check_face(self, face, graph):
+        """
+        Check all rotations of the given face for a safe multigram, and cache the verdict.
+        :param face: Half-edges of the face
+        :param graph: The graph to check safety in
+        :return: The multigram vertices and the type, or None if the face holds no safe multigram
+        """
+        for face_h in face:
+            self.checked[face_h] = self.stamp
+
+        multigram = [self.embedding.origin[face_h] for face_h in face]
+
+        # Facial walks that visit a vertex twice can not be reduced
+        if len(multigram) < 4 or len(set(multigram)) != len(multigram):
+            return None
+
+        for i in range(len(multigram)):
+            rotated_multigram = multigram[i:] + multigram[:i]
+            safe, multigram_type = check_multigram_safety(rotated_multigram, graph)
+
+            if safe:
+                return rotated_multigram, multigram_type
+
+        return None
+
+    def pop_multigram(self, graph):
+        """
+        Get a safe multigram from the faces in the worklist. If the worklist runs dry, the faces near the touched nodes
+        are added, and after that all faces are checked again.
+        :param graph: The graph to check safety in
+        :return: The multigram vertices and the type, or None if no face holds a safe multigram
+        """
+        rescanned = False
+
+        while True:
+            while len(self.queue) > 0:
+                h = self.queue.popleft()
+                self.queued.discard(h)
+
+                if not self.embedding.is_alive(h) or self.checked[h] >= 0:
+                    continue
+
+                # Faces longer than a hexagram can never be one
+                face = self.embedding.traverse_face(h, max_length=6)
+
+                if face is None:
+                    self.checked[h] = self.stamp
+                    continue
+
+                multigram = self.check_face(face, graph)
+
+                if multigram is not None:
+                    return multigram
+
+            if len(self.unexpanded) > 0:
+                self.expand(graph)
+            elif not rescanned:
+                rescanned = True
+                self.push_all()
+            else:
+                return None
+
@@ -1,54 +1,133 @@
 import networkx as nx
 
 from graph_coloring.exceptions import InvalidMultigramException
-from graph_coloring.non_generic.planar_triangle_free.safety import check_if_k_4_is_octagram, check_if_k_5_is_pentagram, \
-    get_distinct_neighbors, check_if_k_5_is_decagram
+from graph_coloring.non_generic.planar_triangle_free.degree_buckets import DegreeBuckets
+from graph_coloring.non_generic.planar_triangle_free.embedding import HalfEdgeEmbedding
+from graph_coloring.non_generic.planar_triangle_free.union_find import UnionFind
+from graph_coloring.non_generic.planar_triangle_free.safety import check_if_k_4_is_octagram, \
+    check_if_k_5_is_pentagram, get_distinct_neighbors, check_if_k_5_is_decagram
 
 
-def identify_vertices(graph: nx.Graph, first_node, second_node):
+def identify_vertices(graph: nx.Graph, embedding: HalfEdgeEmbedding, degree_buckets: DegreeBuckets,
+                      union_find: UnionFind, first_node, second_node, first_corner, second_corner):
     """
-    Identify the vertices from the given multigram, according to the reduction rules.
+    Identify the vertices from the given multigram in place, according to the reduction rules.
     :param graph: The graph where to execute the identification in
-    :param second_node: The first node to be identified, and the node that will be relabeled
-    :param first_node: The second node to be identified
+    :param embedding: The embedding of the graph, updated through the face both nodes lie on
+    :param degree_buckets: The degree buckets of the graph, updated for the nodes that changed degree
+    :param union_find: Union-find recording that the second node was identified into the first node
+    :param first_node: The first node to be identified, and the node that remains
+    :param second_node: The second node to be identified, and the node that is merged into the first one
+    :param first_corner: Half-edge leaving the first node on the face, or None if it has no edges
+    :param second_corner: Half-edge leaving the second node on the face, or None if it has no edges
     :return: The graph with the identified node
     """
-    identified_graph = nx.contracted_nodes(graph, first_node, second_node, self_loops=False)
-    identified_graph = nx.relabel_nodes(identified_graph, {first_node: f"{first_node}_{second_node}"})
-    return identified_graph
+    for neighbor in graph.neighbors(second_node):
+        if neighbor != first_node:
+            graph.add_edge(first_node, neighbor)
 
+    graph.remove_node(second_node)
+    union_find.union(first_node, second_node)
 
-def multigram_reduction(multigram_tuple, graph):
+    lost_edge_nodes = embedding.identify(first_node, second_node, first_corner, second_corner)
+
+    degree_buckets.remove([second_node])
+    degree_buckets.update(graph, lost_edge_nodes + [first_node])
+
+    return graph
+
+
+def get_corner_of_distinct_neighbor(embedding: HalfEdgeEmbedding, distinct_neighbor, multigram_node, removed_nodes):
+    """
+    Get the corner the distinct neighbor of a multigram node will have on the merged face, after removing nodes.
+    :param embedding: The embedding of the graph
+    :param distinct_neighbor: The distinct neighbor that remains
+    :param multigram_node: The multigram node it is adjacent to
+    :param removed_nodes: The nodes that will be removed
+    :return: Half-edge leaving the distinct neighbor on the merged face, or None if it has no edges left
+    """
+    h = embedding.get_half_edge(distinct_neighbor, multigram_node)
+    return embedding.get_corner_after_removal(h, removed_nodes)
+
+
+def remove_multigram_nodes(graph, embedding: HalfEdgeEmbedding, degree_buckets: DegreeBuckets, reduction_log, nodes):
+    """
+    Remove the given nodes from the graph, the embedding and the degree buckets, and log their neighbors.
+    :param graph: The graph to remove the nodes from
+    :param embedding: The embedding to remove the nodes from
+    :param degree_buckets: The degree buckets to remove the nodes from, and to update the neighbors in
+    :param reduction_log: List the removed nodes and their neighbors at the time of removal are appended to
+    :param nodes: The nodes to be removed
+    """
+    deleted_neighbors = {node: list(graph.neighbors(node)) for node in nodes}
+    reduction_log.append((list(nodes), deleted_neighbors))
+
+    neighbors = {neighbor for node_neighbors in deleted_neighbors.values() for neighbor in node_neighbors}
+    graph.remove_nodes_from(nodes)
+
+    for node in nodes:
+        embedding.remove_node(node)
+
+    degree_buckets.remove(nodes)
+    degree_buckets.update(graph, neighbors)
+
+
+def multigram_reduction(multigram_tuple, graph, embedding: HalfEdgeEmbedding, degree_buckets: DegreeBuckets,
+                        union_find: UnionFind, reduction_log):
     """
     Reduce the given graph using the given multigram, according to the reduction rules.
+    The embedding and degree buckets are updated locally for every deletion, identification and edge insertion.
     :param multigram_tuple: The safe multigram to be reduced
     :param graph: The graph where to execute the reduction in
+    :param embedding: The embedding of the graph
+    :param degree_buckets: The degree buckets of the graph
+    :param union_find: Union-find recording the identified nodes
+    :param reduction_log: List of removed nodes and their neighbors at the time of removal
     :return: The graph with the reduced multigram
     """
     multigram = multigram_tuple[0]
+
+    if len(multigram) == 1:
+        remove_multigram_nodes(graph, embedding, degree_buckets, reduction_log, multigram)
+        return graph
+
+    # Half-edges of the facial walk, where face[i] leaves multigram[i]
+    face = embedding.traverse_face(embedding.get_half_edge(multigram[0], multigram[1]))
+
     match len(multigram):
-        case 1:
-            graph.remove_nodes_from(multigram)
-            return graph
         case 4:
             if check_if_k_4_is_octagram(multigram, graph):
-                graph.remove_nodes_from(multigram)
+                remove_multigram_nodes(graph, embedding, degree_buckets, reduction_log, multigram)
                 return graph
             else:
-                return identify_vertices(graph, multigram[0], multigram[2])
+                return identify_vertices(graph, embedding, degree_buckets, union_find, multigram[0], multigram[2],
+                                         face[0], face[2])
         case 5:
             if check_if_k_5_is_decagram(multigram, graph):
                 distinct_neighbors = get_distinct_neighbors(multigram, graph)
-                graph.remove_nodes_from(multigram)
+                removed_nodes = set(multigram)
+                corner_1 = get_corner_of_distinct_neighbor(embedding, distinct_neighbors[0], multigram[0],
+                                                           removed_nodes)
+                corner_3 = get_corner_of_distinct_neighbor(embedding, distinct_neighbors[2], multigram[2],
+                                                           removed_nodes)
+                remove_multigram_nodes(graph, embedding, degree_buckets, reduction_log, multigram)
 
                 graph.add_edge(distinct_neighbors[0], distinct_neighbors[2])
+                embedding.add_edge(corner_1, corner_3)
+                degree_buckets.update(graph, [distinct_neighbors[0], distinct_neighbors[2]])
                 return graph
             elif check_if_k_5_is_pentagram(multigram, graph):
                 distinct_neighbors = get_distinct_neighbors(multigram, graph)
-                graph.remove_nodes_from(multigram[0:4])
+                removed_nodes = set(multigram[0:4])
+                corners = [get_corner_of_distinct_neighbor(embedding, distinct_neighbors[i], multigram[i],
+                                                           removed_nodes) for i in range(1, 4)]
+                corner_5 = embedding.get_corner_after_removal(face[4], removed_nodes)
+                remove_multigram_nodes(graph, embedding, degree_buckets, reduction_log, multigram[0:4])
 
-                identify_1 = identify_vertices(graph, distinct_neighbors[1], multigram[4])
-                identify_2 = identify_vertices(identify_1, distinct_neighbors[2], distinct_neighbors[3])
+                identify_1 = identify_vertices(graph, embedding, degree_buckets, union_find, distinct_neighbors[1],
+                                               multigram[4], corners[0], corner_5)
+                identify_2 = identify_vertices(identify_1, embedding, degree_buckets, union_find,
+                                               distinct_neighbors[2], distinct_neighbors[3], corners[1], corners[2])
 
                 return identify_2
             else:
@@ -56,6 +135,7 @@ def multigram_reduction(multigram_tuple, graph):
                 raise InvalidMultigramException('This is not supposed to happen, '
                                                 'at this stage the multigram has to be a safe pentragram or decagram.')
         case 6:
-            return identify_vertices(graph, multigram[0], multigram[2])
+            return identify_vertices(graph, embedding, degree_buckets, union_find, multigram[0], multigram[2],
+                                     face[0], face[2])
 
     raise InvalidMultigramException
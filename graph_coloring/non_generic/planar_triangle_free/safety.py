@@ -1,6 +1,38 @@
 import itertools
 
-import networkx as nx
+
+def has_path_up_to(graph, source, target, max_length, excluded=frozenset()):
+    """
+    Check with a bounded breadth first search whether there is a path of at most the given length between the source
+    and target, that does not go through the excluded nodes. The search stops at the first path found.
+    :param graph: The graph to find paths in
+    :param source: Node to start the path at
+    :param target: Node to end the path at
+    :param max_length: The maximum number of edges in the path
+    :param excluded: Nodes the path is not allowed to use
+    :return: Whether such a path exists
+    """
+    if source == target:
+        return True
+
+    visited = {source}
+    frontier = [source]
+
+    for _ in range(max_length):
+        next_frontier = []
+
+        for node in frontier:
+            for neighbor in graph.neighbors(node):
+                if neighbor == target:
+                    return True
+
+                if neighbor not in visited and neighbor not in excluded:
+                    visited.add(neighbor)
+                    next_frontier.append(neighbor)
+
+        frontier = next_frontier
+
+    return False
 
 
 def check_safety_k_4_6(multigram, graph):
@@ -10,16 +42,28 @@ def check_safety_k_4_6(multigram, graph):
     :param graph: The graph to find paths in
     :return: Whether the given multigram is safe or not
     """
-    # By definition of the paper
+    # By definition of the paper, there is no path of length at most 3 between v_1 and v_3 outside the multigram
     v_1 = multigram[0]
     v_3 = multigram[2]
+    graph_adjacency = graph.adj
+    v_3_neighbors = set(graph_adjacency[v_3])
+
+    for first_node in graph_adjacency[v_1]:
+        if first_node == v_3:
+            continue
+
+        first_outside = first_node not in multigram
+
+        if first_outside and first_node in v_3_neighbors:
+            return False
 
-    paths = list(nx.all_simple_paths(graph, v_1, v_3, 3))
+        for second_node in graph_adjacency[first_node]:
+            if second_node == v_1 or second_node == v_3:
+                continue
 
-    for path in paths:
-        for node in path:
-            if node not in multigram:
+            if (first_outside or second_node not in multigram) and second_node in v_3_neighbors:
                 return False
+
     return True
 
 
@@ -55,6 +99,47 @@ def get_distinct_neighbors(multigram, graph):
     return distinct_neighbors
 
 
+def check_pentagram_short_paths(graph, v_3, v_4, x_3, x_4, excluded):
+    """
+    Check that every path of length at most 3 between x_3 and x_4 outside the pentagram has length 2,
+    and forms a facial 5-cycle together with v_3 and v_4.
+    :param graph: Graph to do the safety checks in
+    :param v_3: Third node of the pentagram
+    :param v_4: Fourth node of the pentagram
+    :param x_3: Distinct neighbor of v_3
+    :param x_4: Distinct neighbor of v_4
+    :param excluded: Nodes of the pentagram the paths are not allowed to use
+    :return: Bool whether all short paths are allowed
+    """
+    graph_adjacency = graph.adj
+    x_4_neighbors = set(graph_adjacency[x_4])
+
+    for first_node in graph_adjacency[x_3]:
+        if first_node in excluded:
+            continue
+
+        if first_node == x_4:
+            return False
+
+        if first_node in x_4_neighbors:
+            # The 5-cycle v_3 x_3 first_node x_4 v_4 has to be induced, so it has exactly 5 edges
+            cycle = [v_3, x_3, first_node, x_4, v_4]
+            edges = sum(1 for i, node in enumerate(cycle) for other_node in cycle[i + 1:]
+                        if other_node in graph_adjacency[node])
+
+            if edges != 5:
+                return False
+
+        for second_node in graph_adjacency[first_node]:
+            if second_node in excluded or second_node == x_3 or second_node == x_4:
+                continue
+
+            if second_node in x_4_neighbors:
+                return False
+
+    return True
+
+
 def check_safety_pentagram(multigram, graph):
     """
     Check the pentagram for safety as according to the paper.
@@ -64,8 +149,12 @@ def check_safety_pentagram(multigram, graph):
     """
     distinct_neighbors = get_distinct_neighbors(multigram, graph)
 
-    for neighbor_pair in list(itertools.combinations(distinct_neighbors, 2)):
-        if graph.has_edge(neighbor_pair[0], neighbor_pair[1]) or graph.has_edge(neighbor_pair[1], neighbor_pair[0]):
+    # The distinct neighbors have to be distinct nodes, otherwise the identifications would merge a node with itself
+    if len(set(distinct_neighbors)) != 5:
+        return False
+
+    for neighbor_pair in itertools.combinations(distinct_neighbors, 2):
+        if graph.has_edge(neighbor_pair[0], neighbor_pair[1]):
             return False
 
     x_2 = distinct_neighbors[1]
@@ -74,36 +163,14 @@ def check_safety_pentagram(multigram, graph):
     v_3 = multigram[2]
     v_4 = multigram[3]
     v_5 = multigram[4]
-    graph_without_multigram = graph.copy()
-    graph_without_multigram.remove_nodes_from(multigram[0:4])
+    # Instead of removing v_1 to v_4 from a copy of the graph, the searches skip them
+    excluded = set(multigram[0:4])
 
-    # No path of length at most 3 between x_2 and v_5, so length <= 3
-    paths = list(nx.all_simple_paths(graph_without_multigram, x_2, v_5, 3))
-
-    if len(paths) > 0:
+    # No path of length at most 3 between x_2 and v_5
+    if has_path_up_to(graph, x_2, v_5, 3, excluded):
         return False
 
-    paths = list(nx.all_simple_paths(graph_without_multigram, x_3, x_4, 3))
-
-    for path in paths:
-        # 3 nodes, so length 2
-        if len(path) != 3:
-            return False
-
-        completed_path = path.copy()
-        completed_path.append(v_4)
-        completed_path.insert(0, v_3)
-
-        subgraph = nx.induced_subgraph(graph, completed_path)
-        facial_cycles = nx.cycle_basis(subgraph)
-
-        if not len(facial_cycles) == 1:
-            return False
-
-        if not len(facial_cycles[0]) == 5:
-            return False
-
-    return True
+    return check_pentagram_short_paths(graph, v_3, v_4, x_3, x_4, excluded)
 
 
 def check_safety_decagram(multigram, graph):
@@ -118,19 +185,8 @@ def check_safety_decagram(multigram, graph):
     x_1 = distinct_neighbors[0]
     x_3 = distinct_neighbors[2]
 
-    if x_1 == x_3:
-        return False
-
-    if graph.has_edge(x_1, x_3):
-        return False
-
-    # No path of length at most 2 between x_1 and x_3, so length <= 2
-    paths = list(nx.all_simple_paths(graph, x_1, x_3, 2))
-
-    if len(paths) > 0:
-        return False
-
-    return True
+    # No path of length at most 2 between x_1 and x_3
+    return not has_path_up_to(graph, x_1, x_3, 2)
 
 
 def check_if_k_4_is_octagram(multigram, graph):
@@ -1,38 +1,34 @@
 import networkx as nx
 
 from graph_coloring.exceptions import InvalidGraphException
-from graph_coloring.misc import get_vertices_of_degree_n
-from graph_coloring.non_generic.planar_triangle_free.coloring import convert_multigrams_into_coloring
+from graph_coloring.non_generic.planar_triangle_free.coloring import convert_reduction_log_into_coloring
+from graph_coloring.non_generic.planar_triangle_free.degree_buckets import DegreeBuckets
+from graph_coloring.non_generic.planar_triangle_free.embedding import get_half_edge_embedding
+from graph_coloring.non_generic.planar_triangle_free.face_worklist import FaceWorklist
 from graph_coloring.non_generic.planar_triangle_free.reduction import multigram_reduction
-from graph_coloring.non_generic.planar_triangle_free.safety import check_multigram_safety
+from graph_coloring.non_generic.planar_triangle_free.union_find import UnionFind
 
 
-def get_multigram(embedding, graph):
+def get_multigram(worklist: FaceWorklist, degree_buckets: DegreeBuckets, graph):
     """
     Greedily get a multigram by first checking for low degree vertices,
-    and if none are found, get a multigram by walking over a face and checking if it contains a multigram,
+    and if none are found, get a multigram from the faces in the worklist that were touched by earlier reductions,
     until a multigram is found (there has to be one).
-    :param embedding: Planar embedding to walk over faces
+    :param worklist: Worklist of faces of the embedding that are kept up to date by the reductions
+    :param degree_buckets: Buckets of nodes by degree that are kept up to date by the reductions
     :param graph: Graph to check for safety in and for finding low degree vertices
     :return: The multigram vertices, and the type
     """
-    low_degree_vertices = get_vertices_of_degree_n(graph, 2, up_to=True)
-    if len(low_degree_vertices) > 0:
-        return [low_degree_vertices[0]], 'monogram'
+    low_degree_vertex = degree_buckets.get_vertex_up_to(2)
+    if low_degree_vertex is not None:
+        return [low_degree_vertex], 'monogram'
 
-    _, embedding = nx.check_planarity(graph)
-    embedding.check_structure()
+    multigram = worklist.pop_multigram(graph)
 
-    for first_vertex in embedding.nodes:
-        # Greedily get the first multigram
-        cw_neighbor = list(embedding.neighbors_cw_order(first_vertex))[0]
+    if multigram is None:
+        raise InvalidGraphException
 
-        multigram = embedding.traverse_face(first_vertex, cw_neighbor)
-        safe, multigram_type = check_multigram_safety(multigram, graph)
-        if safe:
-            return multigram, multigram_type
-
-    raise InvalidGraphException
+    return multigram
 
 
 def planar_solve(graph: nx.Graph):
@@ -45,25 +41,22 @@ def planar_solve(graph: nx.Graph):
     :param graph: The graph to be colored
     :return: Dict of colors for all nodes
     """
-    # Create the embedding and sanity check that the graph is actually planar
-    embedding: nx.PlanarEmbedding
-    planarity, embedding = nx.check_planarity(graph)
-    embedding.check_structure()
-    assert planarity is True
-
-    temp_embedding = embedding.copy()
+    # Create the embedding once and sanity check that the graph is actually planar
+    temp_embedding = get_half_edge_embedding(graph)
+    assert temp_embedding is not None
     temp_graph = graph.copy()
-    multigram_found = True
-    multigrams = []
-    while multigram_found:
-        if len(list(temp_graph.nodes)) == 0:
-            break
-
-        multigram = get_multigram(temp_embedding, temp_graph)
-        multigrams.append(multigram)
-        temp_graph = multigram_reduction(multigram, temp_graph)
-
-    color_dict = convert_multigrams_into_coloring(multigrams, graph)
+    worklist = FaceWorklist(temp_embedding)
+    degree_buckets = DegreeBuckets(temp_graph)
+    union_find = UnionFind(temp_graph.nodes)
+    reduction_log = []
+    while len(temp_graph) > 0:
+        multigram = get_multigram(worklist, degree_buckets, temp_graph)
+        temp_graph = multigram_reduction(multigram, temp_graph, temp_embedding, degree_buckets, union_find,
+                                         reduction_log)
+
+        worklist.update(temp_graph, temp_embedding.pop_touched())
+
+    color_dict = convert_reduction_log_into_coloring(reduction_log, graph, union_find)
 
     print('Planar Triangle-free: 3-coloring found...')
     return color_dict
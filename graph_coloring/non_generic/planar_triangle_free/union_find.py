@@ -0,0 +1,54 @@
+class UnionFind:
+    """Class recording which nodes were identified with each other, where every set is named after its survivor."""
+    parent: dict
+    size: dict
+    label: dict
+
+    def __init__(self, nodes):
+        self.parent = {node: node for node in nodes}
+        self.size = {node: 1 for node in self.parent}
+        # The root of a set is picked by size, the label is the node that survived the identifications
+        self.label = {node: node for node in self.parent}
+
+    def find_root(self, node):
+        """
+        Get the root of the set of the given node, halving the path on the way.
+        :param node: Node to find the root for
+        :return: The root of the set
+        """
+        while self.parent[node] != node:
+            self.parent[node] = self.parent[self.parent[node]]
+            node = self.parent[node]
+
+        return node
+
+    def find(self, node):
+        """
+        Get the node that the given node was identified into.
+        :param node: Node to find the survivor for
+        :return: The surviving node of the set
+        """
+        return self.label[self.find_root(node)]
+
+    def union(self, survivor, merged):
+        """
+        Record that the merged node was identified into the survivor.
+        :param survivor: The node that remains in the graph
+        :param merged: The node that was merged into the survivor
+        """
+        survivor_root = self.find_root(survivor)
+        merged_root = self.find_root(merged)
+
+        if survivor_root == merged_root:
+            return
+
+        label = self.label[survivor_root]
+
+        if self.size[survivor_root] < self.size[merged_root]:
+            survivor_root, merged_root = merged_root, survivor_root
+
+        self.parent[merged_root] = survivor_root
+        self.size[survivor_root] += self.size.pop(merged_root)
+        del self.label[merged_root]
+        self.label[survivor_root] = label
+
@@ -1,4 +1,9 @@
+import math
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import networkx as nx
+import numpy as np
 import planarity
 from networkx import Graph
 from tqdm import tqdm
@@ -6,13 +11,129 @@ from tqdm import tqdm
 from graph_coloring.exceptions import InvalidGraphException, InvalidColoringException
 
 
+def block_closed_neighborhood(adjacency, blocked, node, change):
+    """
+    Change the count of path nodes blocking the given node and its neighbors.
+    :param adjacency: Neighbors per node
+    :param blocked: Number of blocking path nodes per node
+    :param node: The path node whose closed neighborhood is changed
+    :param change: 1 to block, -1 to unblock
+    """
+    blocked[node] += change
+
+    for neighbor in adjacency[node]:
+        blocked[neighbor] += change
+
+
+def extend_induced_path(adjacency, blocked, path, k, finished_starts=None):
+    """
+    Extend the given induced path at its last node until it has k nodes. A node can be added when no path node
+    other than the last is in its closed neighborhood, which is kept as a count per node, so checking it is O(1).
+    :param adjacency: Neighbors per node
+    :param blocked: Number of path nodes before the last one whose closed neighborhood contains the node
+    :param path: The induced path to extend, changed in place
+    :param k: The number of nodes of the path to find
+    :param finished_starts: Nodes from which all paths were searched already, which can not be the other endpoint
+    :return: Whether the path could be extended to k nodes, in which case path holds it
+    """
+    last = path[-1]
+    is_last = len(path) + 1 == k
+    candidates = []
+
+    for neighbor in adjacency[last]:
+        if blocked[neighbor] > 0:
+            continue
+
+        if is_last:
+            if finished_starts is not None and finished_starts[neighbor]:
+                continue
+
+            path.append(neighbor)
+            return True
+
+        # Nodes inside the path need a neighbor on both sides
+        if len(adjacency[neighbor]) >= 2:
+            candidates.append(neighbor)
+
+    block_closed_neighborhood(adjacency, blocked, last, 1)
+
+    for neighbor in candidates:
+        path.append(neighbor)
+
+        if extend_induced_path(adjacency, blocked, path, k, finished_starts):
+            return True
+
+        path.pop()
+
+    block_closed_neighborhood(adjacency, blocked, last, -1)
+
+    return False
+
+
+def search_induced_path(adjacency, k, starts):
+    """
+    Search for an induced path with k nodes starting at one of the given nodes. Once all paths from a start are
+    searched, it is not used as the other endpoint anymore, so every path is only found from one of its ends.
+    :param adjacency: List of neighbor lists, of nodes numbered from 0
+    :param k: The number of nodes of the path, at least 2
+    :param starts: The nodes to start from
+    :return: The path as a list of node numbers, or None if there is none
+    """
+    blocked = [0] * len(adjacency)
+    finished_starts = [False] * len(adjacency)
+
+    for start in starts:
+        path = [start]
+
+        if extend_induced_path(adjacency, blocked, path, k, finished_starts):
+            return path
+
+        finished_starts[start] = True
+
+    return None
+
+
+def get_distance_levels(graph, source):
+    """
+    Get the nodes by their distance from the given node, with a breadth-first search.
+    :param graph: The graph to search in
+    :param source: The node to start from
+    :return: List of the lists of nodes at every distance, starting with [source]
+    """
+    levels = [[source]]
+    visited = {source}
+
+    while True:
+        next_level = []
+
+        for node in levels[-1]:
+            for neighbor in graph[node]:
+                if neighbor not in visited:
+                    visited.add(neighbor)
+                    next_level.append(neighbor)
+
+        if len(next_level) == 0:
+            return levels
+
+        levels.append(next_level)
+
+
 class GraphChecker:
     @staticmethod
     def valid_3_coloring(graph, coloring_dict):
         # Check that all vertices are colored, max 3 colors are used, and it is a valid coloring
         assert len(graph.nodes()) == len(coloring_dict)
-        max_3 = len(set([colors for _, colors in coloring_dict.items()])) <= 3
-        invalid_coloring = any([coloring_dict[x] == coloring_dict[y] for (x, y) in graph.edges()])
+
+        # Compare the colors of all edge endpoints at once, using integer codes for the nodes and colors
+        node_indices = {node: i for i, node in enumerate(graph.nodes())}
+        color_codes = {}
+        node_colors = np.fromiter((color_codes.setdefault(coloring_dict[node], len(color_codes))
+                                   for node in node_indices), dtype=np.int64, count=len(node_indices))
+        edges = np.fromiter((node_indices[node] for edge in graph.edges() for node in edge), dtype=np.int64,
+                            count=2 * graph.number_of_edges()).reshape(-1, 2)
+
+        max_3 = len(color_codes) <= 3
+        invalid_coloring = bool(np.any(node_colors[edges[:, 0]] == node_colors[edges[:, 1]]))
 
         if not max_3 or invalid_coloring:
             raise InvalidColoringException
@@ -52,13 +173,16 @@ class GraphChecker:
                 raise InvalidGraphException(f"Graph had a path of size {path_length}")
 
         if diameter is not None:
-            diameter_smaller_or_equal = self.graph_check_diameter(graph, diameter)
-            print(f"Graph diameter {nx.diameter(graph)} should be smaller than {diameter}: {diameter_smaller_or_equal}")
+            # The bounds stop once they decide the check, so they are computed once and reused for the messages
+            lower, upper = self.get_diameter_bounds(graph, diameter)
+            diameter_smaller_or_equal = upper <= diameter
+            print(f"Graph diameter between {lower} and {upper} should be smaller than {diameter}: "
+                  f"{diameter_smaller_or_equal}")
 
             # The diameter of the graph should be smaller or equal than the given diameter, so negate
             if not diameter_smaller_or_equal:
                 raise InvalidGraphException(
-                    f"Graph had a diameter of size {nx.diameter(graph)}, while {diameter} is required"
+                    f"Graph had a diameter of at least {lower}, while {diameter} is required"
                 )
 
         if locally_connected is not None:
@@ -72,32 +196,136 @@ class GraphChecker:
                 )
 
     def graph_check_locally_connected(self, graph):
-        for node in graph:
-            print(f"Currently checking node {node} for locally connectedness")
-            if not self.check_locally_connected(graph, [node]):
-                return False
+        not_locally_connected = self.get_not_locally_connected_nodes(graph)
+        print(f"Found {len(not_locally_connected)} nodes that are not locally connected")
 
-        return True
+        return len(not_locally_connected) == 0
 
-    def graph_check_induced_path(self, graph, n, debug=False):
-        for node in graph:
-            if debug:
-                print(f"Currently checking node {node} for induced path")
-            if self.get_induced_path(graph, [node], n):
-                return True
+    @staticmethod
+    def get_not_locally_connected_nodes(graph):
+        """
+        Get all nodes whose neighborhood is not connected, for all nodes at once. Every neighbor u of a node w is an
+        arc (w, u), and every triangle (w, u, v) links the arcs (w, u) and (w, v), so the components among the arcs of
+        w are the components of its neighborhood. The components are found with a union-find over numpy arrays,
+        hooking roots to the smallest label and jumping pointers until every link is inside a component.
+        :param graph: The graph to check
+        :return: List of nodes with a neighborhood of more than one component
+        """
+        nodes = list(graph.nodes)
+        indices = {node: i for i, node in enumerate(nodes)}
+        neighbor_sets = [set(indices[neighbor] for neighbor in graph[node]) for node in nodes]
+
+        # Arcs (w, u) are numbered in the order of w * n + u, so they can be found back with a binary search
+        n = len(nodes)
+        edges = np.fromiter((indices[node] for edge in graph.edges for node in edge), dtype=np.int64,
+                            count=2 * graph.number_of_edges()).reshape(-1, 2)
+        arc_keys = np.sort(np.concatenate((edges[:, 0] * n + edges[:, 1], edges[:, 1] * n + edges[:, 0])))
+        arc_owners = arc_keys // n
+
+        # Every edge (u, v) with a common neighbor w links the arcs (w, u) and (w, v)
+        triangle_nodes = []
+        triangle_counts = []
+        for u, v in edges.tolist():
+            common_neighbors = neighbor_sets[u] & neighbor_sets[v]
+            triangle_nodes.extend(common_neighbors)
+            triangle_counts.append(len(common_neighbors))
+
+        triangle_nodes = np.array(triangle_nodes, dtype=np.int64)
+        triangle_edges = np.repeat(edges, triangle_counts, axis=0)
+        sources = np.searchsorted(arc_keys, triangle_nodes * n + triangle_edges[:, 0])
+        targets = np.searchsorted(arc_keys, triangle_nodes * n + triangle_edges[:, 1])
+
+        labels = np.arange(len(arc_keys))
+
+        while np.any(labels[sources] != labels[targets]):
+            source_labels = labels[sources]
+            target_labels = labels[targets]
+            smallest_labels = np.minimum(source_labels, target_labels)
+            np.minimum.at(labels, source_labels, smallest_labels)
+            np.minimum.at(labels, target_labels, smallest_labels)
+
+            # Let every arc point to its root directly
+            jumped_labels = labels[labels]
+            while np.any(jumped_labels != labels):
+                labels = jumped_labels
+                jumped_labels = labels[labels]
+
+        roots = labels == np.arange(len(arc_keys))
+        components = np.bincount(arc_owners[roots], minlength=n)
+
+        return [nodes[i] for i in np.flatnonzero(components > 1)]
+
+    def graph_check_induced_path(self, graph, n, debug=False, processes=None):
+        return self.get_graph_induced_path(graph, n, debug, processes) is not None
 
-        return False
+    @staticmethod
+    def get_twin_free_graph(graph):
+        """
+        Keep one node of every set of nodes with the same neighbors. Such twins are not adjacent, and two of them can
+        only be on the same induced path as the ends of a path of 3 nodes, so for longer paths the others can go.
+        :param graph: The graph to remove twins from
+        :return: The induced subgraph on one node per set of twins
+        """
+        representatives = {}
+
+        for node in graph:
+            representatives.setdefault(frozenset(graph[node]), node)
+
+        return graph.subgraph(representatives.values())
+
+    def get_graph_induced_path(self, graph, n, debug=False, processes=None):
+        """
+        Find an induced path with n nodes in the given graph. Twins are removed first, components with fewer than n
+        nodes are skipped, and the search starts from the lowest degree nodes, which are the likely path ends.
+        :param graph: The graph to search in
+        :param n: The number of nodes of the path
+        :param debug: Print progress information
+        :param processes: Number of processes to split the start nodes over, or None to search in this process
+        :return: The path as a list of nodes, or None if there is none
+        """
+        if n <= 1:
+            return list(graph.nodes)[:n] if len(graph) >= n else None
+
+        search_graph = self.get_twin_free_graph(graph) if n >= 4 else graph
+        nodes = [node for component in nx.connected_components(search_graph) if len(component) >= n
+                 for node in component]
+        nodes.sort(key=search_graph.degree)
+
+        if debug:
+            print(f"Searching induced paths from {len(nodes)} of {len(graph)} nodes")
+
+        indices = {node: i for i, node in enumerate(nodes)}
+        adjacency = [[indices[neighbor] for neighbor in search_graph[node]] for node in nodes]
+
+        if processes is None or processes <= 1 or len(nodes) < processes:
+            path = search_induced_path(adjacency, n, range(len(nodes)))
+        else:
+            path = None
+
+            # Interleave the start nodes, so every process gets a share of the low degree ones
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                futures = [executor.submit(search_induced_path, adjacency, n, range(i, len(nodes), processes))
+                           for i in range(processes)]
+
+                for future in as_completed(futures):
+                    path = future.result()
+
+                    if path is not None:
+                        for other_future in futures:
+                            other_future.cancel()
+                        break
+
+        return None if path is None else [nodes[i] for i in path]
 
     def graph_check_induced_cycle(self, graph, c):
         if c == 3:
-            # If any of the nodes contain a triangle, we got one
-            for key, value in nx.triangles(graph).items():
-                if value > 0:
-                    return True
-            return False
+            # Intersecting neighbor sets runs in C, and stops at the first edge with a common neighbor
+            neighbor_sets = {node: set(graph[node]) for node in graph}
+            return any(not neighbor_sets[u].isdisjoint(neighbor_sets[v]) for u, v in graph.edges)
 
+        # Every induced cycle goes through an edge, so stop at the first edge that has one
         for edge in graph.edges:
-            if len(self.check_induced_cycle_using_path(graph, edge, c)) > 0:
+            if self.check_induced_cycle(graph, edge, c):
                 return True
 
         return False
@@ -107,8 +335,76 @@ class GraphChecker:
         return planarity.is_planar(graph)
 
     @staticmethod
-    def graph_check_diameter(graph, d):
-        return nx.diameter(graph) <= d
+    def get_diameter_bounds(graph, d=None, eccentricities=None):
+        """
+        Get a lower and an upper bound on the diameter of the given graph with iFUB (Crescenzi et al.). A double sweep
+        gives a lower bound and a central node, the upper bound then follows from the distance levels of the central
+        node, of which the eccentricities are computed from the furthest level inwards until the bounds meet. Most
+        graphs only need a few breadth-first searches instead of one per node.
+        :param graph: The graph to get the bounds for
+        :param d: Stop as soon as the bounds show whether the diameter is at most d, or None for the exact diameter
+        :param eccentricities: Dict of the known eccentricities per node, which are used and filled in
+        :return: The lower and upper bound, equal if the diameter is exact, and infinite if the graph is disconnected
+        """
+        if len(graph) == 0:
+            return 0, 0
+
+        if eccentricities is None:
+            eccentricities = {}
+
+        def get_levels(node):
+            levels = get_distance_levels(graph, node)
+            eccentricities[node] = len(levels) - 1
+            return levels
+
+        # Sweep from a node of maximum degree to the furthest node, and from there again
+        start = max(graph.degree, key=lambda node_degree: node_degree[1])[0]
+        levels = get_levels(start)
+
+        if sum(len(level) for level in levels) < len(graph):
+            return math.inf, math.inf
+
+        sweep_start = levels[-1][0]
+        levels = get_levels(sweep_start)
+        lower = eccentricities[sweep_start]
+
+        # The middle of a shortest path between the sweep ends is close to the center of the graph
+        sweep_end = levels[-1][0]
+        middle = sweep_end
+        for distance in range(len(levels) - 1, len(levels) // 2, -1):
+            previous_level = set(levels[distance - 1])
+            middle = next(neighbor for neighbor in graph[middle] if neighbor in previous_level)
+
+        levels = get_levels(middle)
+        lower = max(lower, eccentricities[middle])
+        upper = 2 * eccentricities[middle]
+
+        # The nodes at distance at most i from the middle are at most 2i apart, so after checking the levels above
+        # i, only a node in them can have a larger eccentricity
+        for i in range(len(levels) - 1, 0, -1):
+            if upper <= lower or (d is not None and (lower > d or upper <= d)):
+                break
+
+            # Going through the middle, the nodes in the level are at most i + ecc(middle) away from any node
+            if i + eccentricities[middle] <= lower:
+                upper = lower
+                break
+
+            for node in levels[i]:
+                if node not in eccentricities:
+                    get_levels(node)
+
+                lower = max(lower, eccentricities[node])
+
+                if d is not None and lower > d:
+                    return lower, upper
+
+            upper = min(upper, max(lower, 2 * (i - 1)))
+
+        return lower, upper
+
+    def graph_check_diameter(self, graph, d, eccentricities=None):
+        return self.get_diameter_bounds(graph, d, eccentricities)[1] <= d
 
     @staticmethod
     def check_induced_path_brute_force(graph, node, n):
@@ -129,137 +425,117 @@ class GraphChecker:
             if len(induced_path_cycles) == 0:
                 return True
 
-    def get_induced_path(self, graph: Graph, s, length_remaining):
-        if length_remaining <= 0:
-            return s
-
-        total_path = []
-        last_path_node = s[-1]
-
-        for v in graph.neighbors(last_path_node):
-            # Check that the neighbor is not the previous node in the path
-            if len(s) > 1 and v == s[-2]:
-                continue
-
-            # Check that no neighbors of v are in the path
-            v_neighbor_in_path = False
-
-            for v_neighbor in graph.neighbors(v):
-                if not v_neighbor == last_path_node and v_neighbor in s:
-                    v_neighbor_in_path = True
-                    break
-
-            if v_neighbor_in_path:
-                continue
-
-            # Add the neighbor as a possible induced path extension, but don't change s for the other extensions
-            s_new = s.copy()
-            s_new.append(v)
-            total_path = self.get_induced_path(graph, s_new, length_remaining - 1)
-
-            if len(total_path) > 0:
-                return total_path
-
-        return total_path
-
-    def find_induced_path(self, graph: Graph, s, length_remaining, illegal_nodes):
-        if length_remaining <= 0:
-            return [s]
-
-        last_path_node = s[-1]
-        paths = []
-
-        if last_path_node in illegal_nodes:
-            return []
-
-        for v in graph.neighbors(last_path_node):
-            # Check that the neighbor is not the previous node in the path
-            if len(s) > 1 and v == s[-2]:
-                continue
-
-            # Check that no neighbors of v are in the path
-            v_neighbor_in_path = False
-
-            for v_neighbor in graph.neighbors(v):
-                if not v_neighbor == last_path_node and v_neighbor in s:
-                    v_neighbor_in_path = True
-                    break
-
-            if v_neighbor_in_path:
-                continue
-
-            # Add the neighbor as a possible induced path extension, but don't change s for the other extensions
-            s_new = s.copy()
-            s_new.append(v)
-            new_paths = self.find_induced_path(graph, s_new, length_remaining - 1, illegal_nodes)
-
-            paths.extend(new_paths)
-
-        # Add the current path as well
-        paths.append(s)
-
-        return paths
-
     def check_induced_path_using_edge(self, graph: Graph, edge, n):
-        # Remove the source as a target
-        graph_without_edge = graph.copy()
-        graph_without_edge.remove_edge(edge[0], edge[1])
-
-        # Separate the paths containing the new edge, and paths not containing the new edge
-        paths_0 = self.find_induced_path(graph_without_edge, [edge[0]], n - 1, [edge[1], graph.neighbors(edge[1])])
-        paths_1 = self.find_induced_path(graph_without_edge, [edge[1]], n - 1, [edge[0], graph.neighbors(edge[0])])
+        """
+        Find an induced path with n nodes through the given edge, by extending the edge away from its first endpoint,
+        and for every such extension, away from its second endpoint.
+        :param graph: The graph to search in
+        :param edge: The edge the path has to go through
+        :param n: The number of nodes of the path
+        :return: The path as a list of nodes, or an empty list if there is none
+        """
+        u, v = edge
+        adjacency = graph.adj
+        blocked = defaultdict(int)
+
+        def extend_both_ways(path):
+            # The part before v ends at u, and v and all nodes of that part but its end block their closed neighborhood
+            end = path[0]
+            # Nodes that can extend the part before v, since they touch no other node of the path than its end
+            candidates = [neighbor for neighbor in adjacency[end] if blocked[neighbor] == 0]
+
+            # Extend from v, for which the end blocks as well, and v itself no longer does
+            block_closed_neighborhood(adjacency, blocked, end, 1)
+            block_closed_neighborhood(adjacency, blocked, v, -1)
+            v_path = [v]
+
+            if len(path) + 1 == n or extend_induced_path(adjacency, blocked, v_path, n - len(path)):
+                return path + v_path
+
+            block_closed_neighborhood(adjacency, blocked, v, 1)
+
+            for neighbor in candidates:
+                found_path = extend_both_ways([neighbor] + path)
+
+                if len(found_path) > 0:
+                    return found_path
+
+            block_closed_neighborhood(adjacency, blocked, end, -1)
 
-        # Loop over all combinations to form n sized paths from the left and right branch of the edge
-        for length_path_0 in range(n):
-            length_path_1 = n - length_path_0
+            return []
 
-            correct_length_path_0 = [path for path in paths_0 if len(path) == length_path_0]
-            correct_length_path_1 = [path for path in paths_1 if len(path) == length_path_1]
+        block_closed_neighborhood(adjacency, blocked, v, 1)
 
-            for path_0 in correct_length_path_0:
-                for path_1 in correct_length_path_1:
-                    if not self.check_crossing_edges(graph_without_edge, path_0, path_1):
-                        return path_0 + path_1
+        return extend_both_ways([u])
 
-        return []
+    @staticmethod
+    def get_induced_half_paths(graph: Graph, start, length, other_end, last_may_touch_other_end):
+        """
+        Get the induced paths with the given number of edges from start, in the graph without the edge between start
+        and other_end, whose nodes after start are not adjacent to other_end.
+        :param graph: The graph to search in
+        :param start: The first node of the paths
+        :param length: The number of edges of the paths
+        :param other_end: The other endpoint of the edge, which the paths may not use or touch
+        :param last_may_touch_other_end: Whether the last node of a path is allowed to be adjacent to other_end
+        :return: Generator of paths, as lists of nodes
+        """
+        path = [start]
+
+        def extend():
+            if len(path) == length + 1:
+                yield path.copy()
+                return
+
+            is_last = len(path) == length
+
+            for node in graph[path[-1]]:
+                if node == other_end or node in path:
+                    continue
+
+                if not (is_last and last_may_touch_other_end) and other_end in graph[node]:
+                    continue
+
+                # The path stays induced if the new node is only adjacent to the current last node
+                if any(node in graph[path_node] for path_node in path[:-1]):
+                    continue
+
+                path.append(node)
+                yield from extend()
+                path.pop()
+
+        return extend()
 
     def check_induced_cycle_using_path(self, graph: Graph, edge, n):
-        # Remove the source as a target
-        graph_without_edge = graph
-        graph_without_edge.remove_edge(edge[0], edge[1])
-
-        # Separate the paths containing the new edge, and paths not containing the new edge
-        print("Finding induced paths...")
-        paths_0 = self.find_induced_path(graph_without_edge, [edge[0]], n - 1, [edge[1], graph.neighbors(edge[1])])
-        paths_1 = self.find_induced_path(graph_without_edge, [edge[1]], n - 1, [edge[0], graph.neighbors(edge[0])])
-
-        # Loop over all combinations to form n sized paths from the left and right branch of the edge
-        tqdm_n = tqdm(range(n))
-        tqdm_n.set_description(desc="Looping over path lengths", refresh=True)
-        for length_path_0 in tqdm_n:
-            length_path_1 = n - length_path_0
-
-            correct_length_path_0 = [path for path in paths_0 if len(path) == length_path_0]
-            correct_length_path_1 = [path for path in paths_1 if len(path) == length_path_1]
-
-            for path_0 in correct_length_path_0:
-                for path_1 in correct_length_path_1:
-                    path_0_without_endpoint = path_0.copy()
-                    path_1_without_endpoint = path_1.copy()
-                    path_0_without_endpoint.pop(-1)
-                    path_1_without_endpoint.pop(-1)
-                    if not self.check_crossing_edges(graph, path_0, path_1_without_endpoint) or not \
-                            self.check_crossing_edges(graph, path_0_without_endpoint, path_1):
-                        endpoint_0 = path_0[-1]
-                        endpoint_1 = path_1[-1]
-
-                        if graph_without_edge.has_edge(endpoint_0, endpoint_1):
-                            cycle = path_0.copy()
-                            cycle.extend(path_1)
-                            graph.add_edge(edge[0], edge[1])
-                            return cycle
-
-        graph.add_edge(edge[0], edge[1])
+        """
+        Find an induced cycle of length n through the given edge, as an induced path between its endpoints. The path
+        is split at a middle node, the halves from the first endpoint are hashed on their middle node, and the halves
+        from the second endpoint are matched against them until a pair forms an induced cycle.
+        :param graph: The graph to search in
+        :param edge: The edge the cycle has to go through
+        :param n: The length of the cycle, at least 4
+        :return: The nodes of the cycle, or an empty list if there is none
+        """
+        u, v = edge
+        u_length = (n - 1) // 2
+
+        u_paths = defaultdict(list)
+        for path in self.get_induced_half_paths(graph, u, u_length, v, False):
+            u_paths[path[-1]].append(path)
+
+        # The middle node is on both halves, it may only touch u when it follows u directly on the cycle
+        for v_path in self.get_induced_half_paths(graph, v, n - 1 - u_length, u, True):
+            v_inner = v_path[1:-1]
+
+            for u_path in u_paths.get(v_path[-1], []):
+                u_inner = u_path[1:-1]
+
+                if any(node in v_inner for node in u_inner):
+                    continue
+
+                if not self.check_crossing_edges(graph, u_inner, v_inner):
+                    return u_path + v_path[-2::-1]
+
         return []
 
     def check_crossing_edges(self, graph: Graph, path_0, path_1):
@@ -275,17 +551,47 @@ class GraphChecker:
 
     def check_induced_cycle(self, graph, edge, c):
         if c == 3:
-            return nx.triangles(graph, edge[0]) > 0
+            # A triangle through the edge is a common neighbor of its endpoints
+            u, v = sorted(edge, key=graph.degree)
+            return not graph[v].keys().isdisjoint(graph[u])
 
         return len(self.check_induced_cycle_using_path(graph, edge, c)) > 0
 
+    @staticmethod
+    def get_neighborhood_components(graph, node):
+        """
+        Get the connected components of the neighborhood of the given node, with a union-find over the edges between
+        its neighbors, without building the induced subgraph.
+        :param graph: The graph the node is in
+        :param node: The node whose neighborhood is split
+        :return: List of components, as lists of nodes
+        """
+        parent = {neighbor: neighbor for neighbor in graph[node]}
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+
+            return x
+
+        for neighbor in parent:
+            for other in graph[neighbor]:
+                if other in parent:
+                    root, other_root = find(neighbor), find(other)
+
+                    if root != other_root:
+                        parent[other_root] = root
+
+        components = defaultdict(list)
+        for neighbor in parent:
+            components[find(neighbor)].append(neighbor)
+
+        return list(components.values())
+
     def check_locally_connected(self, graph, nodes):
         for node in nodes:
-            neighbors = list(graph.neighbors(node))
-            induced_neighbors = nx.induced_subgraph(graph, neighbors)
-
-            num_ccs = nx.number_connected_components(induced_neighbors)
-            if num_ccs != 0 and num_ccs != 1:
+            if len(self.get_neighborhood_components(graph, node)) > 1:
                 return False
 
         return True
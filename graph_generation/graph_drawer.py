@@ -2,6 +2,8 @@ import networkx as nx
 import numpy as np
 from matplotlib import pyplot as plt
 
+from graph_coloring.non_generic.planar_triangle_free.embedding import get_half_edge_embedding
+
 
 def draw_graph_with_color_from_dict(graph, color_dict):
     pos = nx.kamada_kawai_layout(graph)
@@ -29,12 +31,16 @@ def draw_planar_directed(graph):
 
 
 def draw_graph(graph, node_colors, edge_colors=None):
-    # At this size, you don't get any info and it takes long
-    if len(graph.nodes) > 999:
+    # At this size, you don't get any info and it takes long, and there is nothing to draw without nodes
+    if len(graph.nodes) > 999 or len(graph.nodes) == 0:
         return
 
-    if nx.is_planar(graph):
-        nx.draw_planar(graph, node_color=node_colors, edge_color=edge_colors, with_labels=True)
+    # Embed with the planarity extension like the planar solver does, which is faster than the networkx check
+    embedding = get_half_edge_embedding(graph)
+
+    if embedding is not None:
+        nx.draw(graph, pos=nx.planar_layout(embedding.to_planar_embedding()), node_color=node_colors,
+                edge_color=edge_colors, with_labels=True)
     elif nx.is_bipartite(graph) and len(list(nx.connected_components(graph))) == 1:
         w = nx.bipartite.sets(graph)[0]
         nx.draw(graph, pos=nx.bipartite_layout(graph, w),
@@ -1,15 +1,132 @@
 import itertools
 import logging
+import math
 import os
 import random
 from datetime import datetime
+from functools import partial
 
 import networkx as nx
 from tqdm import tqdm
 
+from graph_coloring.exceptions import InvalidGraphException
 from graph_coloring.misc import intersection
 from graph_generation.graph_checker import GraphChecker
 from graph_generation.graph_drawer import draw_graph
+from graph_generation.incremental_planarity import IncrementalPlanarity
+
+
+def sample_edges(n, p):
+    """
+    Get the edges of a G(n, p) random graph in the order of itertools.combinations, by jumping from one accepted
+    pair to the next with a geometrically distributed skip (Batagelj and Brandes), instead of drawing a number for
+    every pair.
+    :param n: The number of vertices
+    :param p: The probability of every pair becoming an edge
+    :return: Generator of the accepted pairs
+    """
+    if p <= 0:
+        return
+
+    if p >= 1:
+        yield from itertools.combinations(range(n), 2)
+        return
+
+    log_q = math.log(1 - p)
+    # Pairs are indexed as (i, j) with i < j, j is moved forward and wraps to the next row when it runs past n - 1
+    i, j = 0, 0
+
+    while i < n - 1:
+        j += 1 + int(math.log(1 - random.random()) / log_q)
+
+        while j >= n and i < n - 1:
+            j -= n - i - 2
+            i += 1
+
+        if i < n - 1:
+            yield i, j
+
+
+def sample_edges_shuffled(n, p):
+    """
+    Get the edges of a G(n, p) random graph in a random order. Since every pair is accepted independently, shuffling
+    only the accepted pairs gives the same distribution as shuffling all pairs before accepting them.
+    :param n: The number of vertices
+    :param p: The probability of every pair becoming an edge
+    :return: List of the accepted pairs
+    """
+    edges = list(sample_edges(n, p))
+    random.shuffle(edges)
+
+    return edges
+
+
+def random_planar_triangulation(vertices, flips):
+    """
+    Get a random planar triangulation of minimum degree 3, by inserting every vertex into a random face, starting
+    from a tetrahedron, and then flipping random edges. A flip replaces the diagonal of the 2 faces of an edge by the
+    other diagonal, and is skipped if that edge already exists or an end of the old one would drop to degree 2.
+    :param vertices: The number of vertices, at least 4
+    :param flips: The number of edge flips to try
+    :return: List of faces as tuples of 3 vertices in the same orientation, and dict of directed edges
+             u * vertices + v to the index of the face they are on
+    """
+    faces = [(0, 1, 2), (0, 2, 3), (0, 3, 1), (1, 3, 2)]
+    edge_faces = {face[j] * vertices + face[j - 2]: i for i, face in enumerate(faces) for j in range(3)}
+    degrees = [3] * vertices
+
+    for x in range(4, vertices):
+        face_index = int(random.random() * len(faces))
+        a, b, c = faces[face_index]
+        faces[face_index] = (a, b, x)
+        faces.extend([(b, c, x), (c, a, x)])
+
+        for u, v, i in ((b, x, face_index), (x, a, face_index), (b, c, len(faces) - 2), (c, x, len(faces) - 2),
+                        (x, b, len(faces) - 2), (c, a, len(faces) - 1), (a, x, len(faces) - 1),
+                        (x, c, len(faces) - 1)):
+            edge_faces[u * vertices + v] = i
+
+        degrees[a] += 1
+        degrees[b] += 1
+        degrees[c] += 1
+
+    for _ in range(flips):
+        face_index = int(random.random() * len(faces))
+        i = int(random.random() * 3)
+        u, v, w = faces[face_index][i:] + faces[face_index][:i]
+        other_index = edge_faces[v * vertices + u]
+        other_face = faces[other_index]
+        z = other_face[(other_face.index(v) + 2) % 3]
+
+        if degrees[u] <= 3 or degrees[v] <= 3 or w * vertices + z in edge_faces:
+            continue
+
+        # The faces u, v, w and v, u, z become u, z, w and z, v, w
+        faces[face_index] = (u, z, w)
+        faces[other_index] = (z, v, w)
+        del edge_faces[u * vertices + v]
+        del edge_faces[v * vertices + u]
+
+        for a, b, i in ((u, z, face_index), (z, w, face_index), (v, w, other_index), (w, z, other_index)):
+            edge_faces[a * vertices + b] = i
+
+        degrees[u] -= 1
+        degrees[v] -= 1
+        degrees[w] += 1
+        degrees[z] += 1
+
+    return faces, edge_faces
+
+
+def get_random_part_sizes(total, parts):
+    """
+    Get random sizes of at least 1 that add up to the total, from cutting it at random positions.
+    :param total: The sum of the sizes
+    :param parts: The number of sizes
+    :return: List of the sizes
+    """
+    cuts = sorted(random.sample(range(1, total), parts - 1))
+    return [end - start for start, end in zip([0] + cuts, cuts + [total])]
 
 
 class GraphGenerator:
@@ -22,8 +139,25 @@ class GraphGenerator:
     def write_graph(graph, path):
         path = f"./graphs/{path}.txt"
         if not os.path.exists("graphs/"):
-            os.makedirs("graphs/")
-        nx.write_adjlist(graph, path)
+            os.makedirs("graphs/", exist_ok=True)
+        # Write to a temporary file first, so that an interrupted run never leaves a partial graph behind
+        nx.write_adjlist(graph, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+
+    @staticmethod
+    def write_coloring(coloring, path):
+        """
+        Write a coloring next to the graphs, in a separate folder so that it is not read as a graph, with one node and
+        its color per line.
+        :param coloring: Dict of colors for all nodes
+        :param path: The name of the graph the coloring belongs to
+        """
+        path = f"./colorings/{path}.txt"
+        if not os.path.exists("colorings/"):
+            os.makedirs("colorings/", exist_ok=True)
+        with open(f"{path}.tmp", 'w') as file:
+            file.writelines(f"{node} {color}\n" for node, color in coloring.items())
+        os.replace(f"{path}.tmp", path)
 
     def split_list(self, alist, wanted_parts=1):
         length = len(alist)
@@ -32,29 +166,27 @@ class GraphGenerator:
 
     def erdos_renyi_with_checks(self, n, p,
                                 path_length=None, cycle_size=None, planar=None, diameter=None, locally_connected=None,
-                                shuffle=True, seed=None, batch_size=1):
+                                shuffle=True, seed=None, batch_size=1, incremental_planarity=True):
         random.seed(seed)
 
-        # All combinations of vertices that could become an edge
-        edges = list(itertools.combinations(range(n), 2))
+        # Only the pairs that become a candidate are drawn, so memory and time depend on the edges and not on n^2
+        edges = sample_edges_shuffled(n, p) if shuffle else sample_edges(n, p)
         g = nx.Graph()
 
-        if shuffle:
-            random.shuffle(edges)
-
         # Add all n vertices to the graph without edges
         g.add_nodes_from(range(n))
 
+        # Planar graphs keep an embedding of their 2-core, so most candidates are accepted without a planarity test
+        incremental_planar = IncrementalPlanarity(g) if planar is True and incremental_planarity else None
+        # Edges removed by the other checks also have to leave the embedding
+        remove_edge = g.remove_edge if incremental_planar is None else partial(incremental_planar.remove_edge, g)
+
         tqdm_edges = tqdm(edges)
         tqdm_edges.set_description(desc="Checking edges")
 
         batch_edges = []
 
         for e in tqdm_edges:
-            # For each edge randomly make it a candidate
-            if random.random() >= p:
-                continue
-
             batch_edges.append(e)
 
             # If it is a candidate, add it to the graph and do the required checks
@@ -64,7 +196,17 @@ class GraphGenerator:
                 continue
 
             # If the edge breaks a requirement, remove it and start with a new edge
-            if planar is not None and planar != self.checker.graph_check_planar(g):
+            if incremental_planar is not None:
+                # Only the edges of the batch that break planarity are removed, the rest is kept
+                removed_edges = incremental_planar.keep_planar_edges(g, batch_edges)
+
+                if len(removed_edges) > 0:
+                    logging.info(f"Edges {removed_edges} were not okay")
+                    batch_edges = [edge for edge in batch_edges if edge not in removed_edges]
+
+                    if len(batch_edges) == 0:
+                        continue
+            elif planar is not None and planar != self.checker.graph_check_planar(g):
                 for edge in batch_edges:
                     g.remove_edge(edge[0], edge[1])
 
@@ -75,29 +217,40 @@ class GraphGenerator:
             if cycle_size is not None:
                 for edge in batch_edges:
                     if self.checker.check_induced_cycle(g, edge, cycle_size):
-                        g.remove_edge(edge[0], edge[1])
+                        remove_edge(edge[0], edge[1])
 
                 logging.info(f"Edge {e} was not okay")
                 batch_edges = []
                 continue
 
-            if path_length is not None and self.checker.check_induced_path(g, e, path_length):
-                g.remove_edge(e[0], e[1])
-                logging.info(f"Edge {e} was not okay")
-                continue
+            if path_length is not None:
+                # The batch is done either way, so accepted edges are not passed to the planarity check again
+                path_edges = [edge for edge in batch_edges if self.checker.check_induced_path(g, edge, path_length)]
+                batch_edges = []
+
+                if len(path_edges) > 0:
+                    for edge in path_edges:
+                        remove_edge(edge[0], edge[1])
+
+                    logging.info(f"Edges {path_edges} were not okay")
+                    continue
 
             batch_edges = []
             logging.info(f"Edge {e} was okay")
 
-        if planar is not None and planar != self.checker.graph_check_planar(g):
+        # Sparse graphs can end without any candidate, so only check a remaining batch
+        if len(batch_edges) > 0 and incremental_planar is not None:
+            removed_edges = incremental_planar.keep_planar_edges(g, batch_edges)
+            batch_edges = [edge for edge in batch_edges if edge not in removed_edges]
+        elif len(batch_edges) > 0 and planar is not None and planar != self.checker.graph_check_planar(g):
             for edge in batch_edges:
                 g.remove_edge(edge[0], edge[1])
 
             logging.info(f"Edge {e} was not okay")
 
-        if cycle_size is not None and self.checker.check_induced_cycle(g, e, cycle_size):
+        if len(batch_edges) > 0 and cycle_size is not None and self.checker.check_induced_cycle(g, e, cycle_size):
             for edge in batch_edges:
-                g.remove_edge(edge[0], edge[1])
+                remove_edge(edge[0], edge[1])
 
             logging.info(f"Edge {e} was not okay")
 
@@ -108,50 +261,60 @@ class GraphGenerator:
         return g
 
     def make_neighbors_connected(self, graph, node):
-        neighbors = list(graph.neighbors(node))
-        induced_neighbors = nx.induced_subgraph(graph, neighbors)
-
-        ccs = list(nx.connected_components(induced_neighbors))
-
-        for i in range(len(ccs) - 1):
-            cc_1 = list(ccs[i])
-            cc_2 = list(ccs[i + 1])
+        """
+        Connect the components of the neighborhood of the given node in a chain. The added edges stay inside the
+        neighborhood, so the endpoints stay locally connected through the given node.
+        :param graph: The graph to add the edges to
+        :param node: The node whose neighborhood is connected
+        :return: List of the added edges
+        """
+        ccs = self.checker.get_neighborhood_components(graph, node)
+        edges = [(ccs[i][0], ccs[i + 1][0]) for i in range(len(ccs) - 1)]
+        graph.add_edges_from(edges)
 
-            graph.add_edge(cc_1[0], cc_2[0])
+        return edges
 
     def locally_connected_generation(self, n, p, seed=None):
         random.seed(seed)
 
         print('Generating erdos renyi graph')
-        graph = nx.gnp_random_graph(n, p, seed)
+        graph = nx.Graph()
+        graph.add_nodes_from(range(n))
+        graph.add_edges_from(sample_edges(n, p))
         print('Done generating erdos renyi graph')
 
-        tqdm_nodes = tqdm(list(graph.nodes))
-        tqdm_nodes.set_description(desc="Checking nodes")
+        # Adding edges inside a neighborhood never disconnects another neighborhood, so the nodes to fix can be
+        # found at once, and only the nodes that got new neighbors have to be validated again
+        changed_nodes = set()
+
+        tqdm_nodes = tqdm(self.checker.get_not_locally_connected_nodes(graph))
+        tqdm_nodes.set_description(desc="Connecting neighborhoods")
 
         for node in tqdm_nodes:
-            is_locally_connected = self.checker.check_locally_connected(graph, [node])
-            if not is_locally_connected:
-                self.make_neighbors_connected(graph, node)
+            changed_nodes.add(node)
+            changed_nodes.update(edge_node for edge in self.make_neighbors_connected(graph, node) for edge_node in edge)
 
         ccs = list(nx.connected_components(graph))
         tqdm_ccs = tqdm(range(len(ccs) - 1))
-        tqdm_ccs.set_description(desc="Checking ccs")
+        tqdm_ccs.set_description(desc="Connecting ccs")
 
         for i in tqdm_ccs:
-            cc1 = list(ccs[i])
-            cc2 = list(ccs[i+1])
-
-            node1 = cc1[0]
-            node2 = cc2[0]
+            node1 = next(iter(ccs[i]))
+            node2 = next(iter(ccs[i + 1]))
 
+            # Both endpoints get a neighbor from another component, which is then connected to their neighborhood
             graph.add_edge(node1, node2)
+            changed_nodes.update([node1, node2])
 
-            self.make_neighbors_connected(graph, node1)
-            self.make_neighbors_connected(graph, node2)
+            for node in (node1, node2):
+                changed_nodes.update(edge_node for edge in self.make_neighbors_connected(graph, node)
+                                     for edge_node in edge)
 
         draw_graph(graph, None)
-        self.checker.sanity_check_graph(graph, locally_connected=True)
+
+        print(f"Validating the {len(changed_nodes)} nodes whose neighborhood changed")
+        if not self.checker.check_locally_connected(graph, changed_nodes):
+            raise InvalidGraphException("Graph was not locally connected")
 
         return graph
 
@@ -259,33 +422,316 @@ class GraphGenerator:
 
         return graph
 
+    def planar_triangle_free_generation(self, nodes, odd_fraction=0.1, seed=None, verify=False):
+        """
+        Generate a planar triangle-free graph of minimum degree 3 as the radial graph of a random planar
+        triangulation: every vertex and every face of the triangulation becomes a node, and a face node is adjacent to
+        the 3 corners of its face. Radial graphs are quadrangulations, so they are bipartite and triangle-free, and
+        the triangulation has minimum degree 3, so the radial graph has as well.
+        Two kinds of local perturbations are added inside faces of the quadrangulation. A ring of 4 new nodes with a
+        spoke to each corner of a face keeps it a quadrangulation. The odd perturbation removes the edge between two
+        faces and puts a ring of 5 new nodes with a spoke to 5 of the 6 corners in the hexagon, which gives 2
+        pentagonal faces. Every new node has 1 spoke and 2 ring neighbors, and every spoke ends at a different
+        corner, so neither adds a triangle, and the nodes of the removed edge get a spoke instead.
+        :param nodes: The number of nodes, at least 16
+        :param odd_fraction: The fraction of the nodes that is added by odd perturbations, at most about 0.5
+        :param seed: Seed for the random generator
+        :param verify: Check the triangle-freeness and planarity of the result afterwards, which the construction
+                       already guarantees
+        :return: The generated graph
+        """
+        random.seed(seed)
+
+        # The radial graph of a triangulation with v vertices has v + 2v - 4 nodes, the perturbations add 5 or 4
+        odd_count = round(odd_fraction * nodes / 5)
+        even_count = (nodes + 1 + odd_count) % 3
+        vertices = (nodes + 4 - 5 * odd_count - 4 * even_count) // 3
+
+        if vertices < 4:
+            raise InvalidGraphException(f"{nodes} nodes are too few for the perturbations")
+
+        print("Flipping triangulation edges...")
+        faces, edge_faces = random_planar_triangulation(vertices, 3 * vertices)
+
+        # Face nodes are numbered after the vertices, incidences as face * vertices + vertex
+        removed_incidences = set()
+        used_edges = set()
+        edges = []
+        node_count = vertices + len(faces)
+        perturbations = [5] * odd_count + [4] * even_count
+        attempts = 0
+
+        print("Adding perturbations...")
+
+        while len(perturbations) > 0:
+            attempts += 1
+
+            if attempts > 100 * (odd_count + even_count) + 1000:
+                raise InvalidGraphException("Could not find enough faces for the perturbations")
+
+            face_index = int(random.random() * len(faces))
+            i = int(random.random() * 3)
+            u, v, w = faces[face_index][i:] + faces[face_index][:i]
+            # The faces of the quadrangulation are the edges of the triangulation, which are used at most once
+            uv_key, uw_key = min(u, v) * vertices + max(u, v), min(u, w) * vertices + max(u, w)
+
+            if uv_key in used_edges or (perturbations[-1] == 5 and uw_key in used_edges):
+                continue
+
+            uv_face = vertices + edge_faces[v * vertices + u]
+
+            if perturbations[-1] == 5:
+                # The faces of uv and wu share the edge between u and this face, without it they form a hexagon
+                wu_face = vertices + edge_faces[u * vertices + w]
+                removed_incidences.add(face_index * vertices + u)
+                used_edges.update([uv_key, uw_key])
+                # The hexagon is face, w, wu_face, u, uv_face, v, of which w gets no spoke
+                corners = [vertices + face_index, wu_face, u, uv_face, v]
+            else:
+                used_edges.add(uv_key)
+                corners = [u, uv_face, v, vertices + face_index]
+
+            ring = list(range(node_count, node_count + len(corners)))
+            edges.extend(zip(corners, ring))
+            edges.extend(zip(ring, ring[1:] + ring[:1]))
+            node_count += len(ring)
+            perturbations.pop()
+
+        graph = nx.Graph()
+        graph.add_nodes_from(range(node_count))
+        graph.add_edges_from(edges)
+        graph.add_edges_from((vertices + face_index, u) for face_index, face in enumerate(faces) for u in face
+                             if face_index * vertices + u not in removed_incidences)
+
+        if verify:
+            if self.checker.graph_check_induced_cycle(graph, 3):
+                raise InvalidGraphException("Generated graph contains a triangle")
+
+            if not self.checker.graph_check_planar(graph):
+                raise InvalidGraphException("Generated graph is not planar")
+
+        print(f"Generated {len(graph)} nodes and {graph.number_of_edges()} edges, "
+              f"bipartite: {nx.is_bipartite(graph)}")
+
+        return graph
+
+    def grow_p7_c3_free_pattern(self, size, p):
+        """
+        Grow a small connected (P7, C3)-free graph from a cycle of 5 nodes. Every new node gets a random independent
+        set of the earlier nodes as neighbors, each node being picked with probability p, and is kept only if it
+        closes no induced path of 7 nodes, which then has to use one of its edges.
+        :param size: The number of nodes of the pattern, at least 5
+        :param p: The probability of every earlier node becoming a neighbor of a new node
+        :return: The pattern graph
+        """
+        pattern = nx.cycle_graph(5)
+        attempts = 0
+
+        while len(pattern) < size:
+            attempts += 1
+            node = len(pattern)
+            neighbors = []
+
+            # Neighbors that are not adjacent to each other keep the pattern triangle-free
+            for candidate in random.sample(list(pattern.nodes), len(pattern)):
+                if random.random() < p and not any(pattern.has_edge(candidate, neighbor) for neighbor in neighbors):
+                    neighbors.append(candidate)
+
+            if len(neighbors) == 0:
+                neighbors.append(random.randrange(len(pattern)))
+
+            pattern.add_edges_from((node, neighbor) for neighbor in neighbors)
+
+            if any(self.checker.check_induced_path(pattern, (node, neighbor), 7) for neighbor in neighbors):
+                pattern.remove_node(node)
+
+        print(f"Grew a pattern of {size} nodes in {attempts} attempts")
+
+        return pattern
+
+    def p7_c3_free_generation(self, nodes, p, pattern_size=10, seed=None, verify=True, average_degree=None):
+        """
+        Generate a connected (P7, C3)-free graph as a randomized version of path_free_generation: the nodes are split
+        over the nodes of a random (P7, C3)-free pattern in random parts, and the parts of adjacent pattern nodes are
+        fully connected. The parts are sets of twins, so a triangle or an induced path of at least 4 nodes uses at
+        most one node per part and is found in the pattern as well, which makes the pattern the certificate of the
+        class: the graph without twins is an induced subgraph of it.
+        All parts are random by default, which gives a density that does not depend on the number of nodes. With an
+        average degree, the nodes go to the parts of a random maximal independent set of the pattern, and the other
+        parts get a fixed small size, so the number of edges grows linearly with the number of nodes.
+        :param nodes: The number of nodes, at least the pattern size
+        :param p: The probability of a pattern node becoming a neighbor of a later pattern node
+        :param pattern_size: The number of nodes of the pattern, at least 5
+        :param seed: Seed for the random generator
+        :param verify: Check the result on the graph without twins afterwards
+        :param average_degree: The average degree to approximate, or None for random parts. It can not go below twice
+                               the average pattern degree of the independent set.
+        :return: The generated graph
+        """
+        random.seed(seed)
+
+        pattern = self.grow_p7_c3_free_pattern(pattern_size, p)
+
+        if average_degree is None:
+            part_sizes = get_random_part_sizes(nodes, pattern_size)
+        else:
+            independent_set = nx.maximal_independent_set(pattern, seed=random.randrange(2 ** 32))
+            mean_degree = sum(pattern.degree[node] for node in independent_set) / len(independent_set)
+            # Every node of the large parts has its pattern degree times the small part size as degree
+            small_size = max(1, round(average_degree / (2 * mean_degree)))
+            large_nodes = nodes - small_size * (pattern_size - len(independent_set))
+
+            if large_nodes < len(independent_set):
+                raise InvalidGraphException(f"{nodes} nodes are too few for parts of size {small_size}")
+
+            part_sizes = [small_size] * pattern_size
+
+            for node, size in zip(independent_set, get_random_part_sizes(large_nodes, len(independent_set))):
+                part_sizes[node] = size
+
+        bounds = [0] + list(itertools.accumulate(part_sizes))
+        parts = [range(bounds[i], bounds[i + 1]) for i in range(pattern_size)]
+
+        graph = nx.Graph()
+        graph.add_nodes_from(range(nodes))
+
+        tqdm_edges = tqdm(pattern.edges)
+        tqdm_edges.set_description(desc="Connecting parts")
+
+        for u, v in tqdm_edges:
+            self.fully_connect_sets(graph, parts[u], parts[v])
+
+        if verify:
+            twin_free_graph = self.checker.get_twin_free_graph(graph)
+
+            if self.checker.graph_check_induced_cycle(twin_free_graph, 3):
+                raise InvalidGraphException("Generated graph contains a triangle")
+
+            if self.checker.graph_check_induced_path(twin_free_graph, 7):
+                raise InvalidGraphException("Generated graph contains an induced path of 7 nodes")
+
+        print(f"Generated {len(graph)} nodes and {graph.number_of_edges()} edges, "
+              f"average degree: {2 * graph.number_of_edges() / len(graph)}")
+
+        return graph
+
+    def planted_3_coloring_generation(self, nodes, average_degree, quiet=False, seed=None):
+        """
+        Generate a random graph with a hidden 3-coloring: every node gets a color, and edges are drawn uniformly among
+        the pairs of nodes with different colors until the average degree is reached. Around an average degree of
+        4.69, the colorability threshold of random graphs, these are the hardest instances for the solvers, while the
+        planted coloring still proves that a 3-coloring exists.
+        Without quiet, every node picks a color independently. With quiet, the color classes have equal sizes and the
+        edges are split equally between the 3 pairs of classes, so the degrees of the classes look like those of a
+        random graph with the same number of edges, and below the condensation threshold the planted graph cannot be
+        told apart from it (Krzakala and Zdeborova).
+        :param nodes: The number of nodes, at least 3
+        :param average_degree: The average degree of the graph
+        :param quiet: Balance the color classes and the edges between them
+        :param seed: Seed for the random generator
+        :return: The generated graph, and the planted coloring as a dict of colors for all nodes
+        """
+        random.seed(seed)
+
+        if quiet:
+            node_colors = [i % 3 for i in range(nodes)]
+        else:
+            node_colors = [int(random.random() * 3) for _ in range(nodes)]
+
+        random.shuffle(node_colors)
+        classes = [[node for node in range(nodes) if node_colors[node] == color] for color in range(3)]
+        class_pairs = [(0, 1), (0, 2), (1, 2)]
+        pair_sizes = [len(classes[a]) * len(classes[b]) for a, b in class_pairs]
+        edge_count = min(round(average_degree * nodes / 2), sum(pair_sizes))
+
+        if quiet:
+            # The classes have the same size, so equal shares are proportional to the possible pairs as well
+            pair_edge_counts = [edge_count // 3 + (i < edge_count % 3) for i in range(3)]
+        else:
+            # Every possible pair is equally likely, so the pairs of classes get edges by their number of pairs
+            pair_edge_counts = [0, 0, 0]
+
+            for pair in random.choices(range(3), weights=pair_sizes, k=edge_count):
+                pair_edge_counts[pair] += 1
+
+        # Pairs of nodes are encoded as integers, rejecting duplicates is cheap as long as the graph is sparse
+        edges = set()
+
+        for (a, b), pair_edge_count, pair_size in zip(class_pairs, pair_edge_counts, pair_sizes):
+            pair_edges = set()
+            pair_edge_count = min(pair_edge_count, pair_size)
+
+            while len(pair_edges) < pair_edge_count:
+                u = classes[a][int(random.random() * len(classes[a]))]
+                v = classes[b][int(random.random() * len(classes[b]))]
+                pair_edges.add(min(u, v) * nodes + max(u, v))
+
+            edges |= pair_edges
+
+        graph = nx.Graph()
+        graph.add_nodes_from(range(nodes))
+        graph.add_edges_from(divmod(edge, nodes) for edge in edges)
+
+        color_names = ['red', 'green', 'blue']
+        coloring = {node: color_names[node_colors[node]] for node in range(nodes)}
+        self.checker.valid_3_coloring(graph, coloring)
+
+        print(f"Generated {len(graph)} nodes and {graph.number_of_edges()} edges, "
+              f"average degree: {2 * graph.number_of_edges() / len(graph)}")
+
+        return graph, coloring
+
     def find_graphs_with_conditions(self, nodes, p,
                                     path_length=None, cycle_size=None, planar=None, diameter=None,
-                                    locally_connected=None, shuffle=None, seed=0):
+                                    locally_connected=None, shuffle=None, seed=0, constructive=None,
+                                    planted=None, path=None):
         print(f"Seed: {seed}")
-        path = f"graph-nodes-{nodes}-p-{p}-path-{path_length}-cycle-{cycle_size}-" \
+        path = path or f"graph-nodes-{nodes}-p-{p}-path-{path_length}-cycle-{cycle_size}-" \
                f"planar-{planar}-diameter-{diameter}-locally_connected-{locally_connected}-shuffle-{shuffle}" \
+               f"{'-constructive' if constructive else ''}{f'-{planted}' if planted else ''}" \
                f"-{datetime.now().strftime('%d-%m-%Y-%H:%M:%S')}"
 
         if not os.path.exists("logs/"):
-            os.makedirs("logs/")
-
-        logging.basicConfig(filename=f"./logs/{path}.log",
-                            filemode='a',
-                            format='%(asctime)s,%(msecs)d %(name)s %(levelname)s %(message)s',
-                            datefmt='%H:%M:%S',
-                            level=logging.INFO)
-
-        if locally_connected is not None:
-            graph = self.locally_connected_generation(nodes, p, seed)
-        elif path_length is not None:
-            graph = self.path_free_generation(nodes, p, path_length, cycle_size, shuffle, seed)
-        else:
-            graph = self.erdos_renyi_with_checks(nodes, p, path_length, cycle_size, planar, diameter,
-                                                 locally_connected, shuffle, seed)
-            # graph = self.embedding_generation(nodes, p, seed)
-
-        # Graph passed all checks, save it
-        self.write_graph(graph, path)
+            os.makedirs("logs/", exist_ok=True)
+
+        # basicConfig only configures the root logger once per process, so pool workers that generate several
+        # instances would log all of them to the first file, every instance gets its own handler instead
+        handler = logging.FileHandler(f"./logs/{path}.log", mode='a')
+        handler.setFormatter(logging.Formatter('%(asctime)s,%(msecs)d %(name)s %(levelname)s %(message)s',
+                                               datefmt='%H:%M:%S'))
+        root_logger = logging.getLogger()
+        root_logger.addHandler(handler)
+        root_logger.setLevel(logging.INFO)
+
+        try:
+            coloring = None
+
+            if planted is not None:
+                # The hidden coloring needs no further checks, p gives the average degree as for G(n, p)
+                graph, coloring = self.planted_3_coloring_generation(nodes, p * (nodes - 1), planted == 'quiet', seed)
+            elif locally_connected is not None:
+                graph = self.locally_connected_generation(nodes, p, seed)
+            elif constructive and planar is True and cycle_size == 3:
+                # p is used as the fraction of nodes in odd perturbations
+                graph = self.planar_triangle_free_generation(nodes, p, seed)
+            elif constructive and path_length == 7 and cycle_size == 3:
+                # p gives the average degree as for G(n, p), so the number of edges stays linear in the number of nodes
+                graph = self.p7_c3_free_generation(nodes, 0.5, seed=seed, average_degree=p * (nodes - 1))
+            elif path_length is not None:
+                graph = self.path_free_generation(nodes, p, path_length, cycle_size, shuffle, seed)
+            else:
+                graph = self.erdos_renyi_with_checks(nodes, p, path_length, cycle_size, planar, diameter,
+                                                     locally_connected, shuffle, seed)
+                # graph = self.embedding_generation(nodes, p, seed)
+
+            # The graph is written last, so that an existing graph file means the instance is complete
+            if coloring is not None:
+                self.write_coloring(coloring, path)
+
+            # Graph passed all checks, save it
+            self.write_graph(graph, path)
+        finally:
+            root_logger.removeHandler(handler)
+            handler.close()
 
         return graph
@@ -0,0 +1,340 @@
+import networkx as nx
+import planarity
+from networkx.utils import UnionFind
+
+from graph_coloring.non_generic.planar_triangle_free.embedding import HalfEdgeEmbedding, get_embedded_rotation_system, \
+    get_half_edge_embedding, get_planarity_graph
+
+
+class IncrementalPlanarity:
+    """
+    Class keeping a planar embedding of the 2-core of a growing graph. The rest of the graph consists of trees that
+    hang off a single node of the core or form components on their own, so they never affect planarity. A candidate
+    edge only adds the paths from its endpoints to the core, and it is accepted without a test when those end in the
+    same node, or when their ends lie on a common face of the embedding. The other candidates are tested on a copy of
+    the core in the planarity extension, which is much smaller than the whole graph.
+    """
+    core: set
+    planarity_graph: planarity.Graph
+    indices: dict
+    embedding: HalfEdgeEmbedding
+    components: UnionFind
+
+    def __init__(self, graph: nx.Graph):
+        self.core = set(nx.k_core(graph, 2).nodes)
+        self.embedding = get_half_edge_embedding(graph.subgraph(self.core))
+        # Copy of the core in the planarity extension, so a test only has to add the paths of the candidates to it
+        self.planarity_graph, self.indices = None, {}
+        self.copy_core(graph, 0)
+        self.components = UnionFind(graph.nodes)
+
+        for u, v in graph.edges:
+            self.components.union(u, v)
+
+    def copy_core(self, graph, new_nodes):
+        """
+        Copy the core into a new planarity graph, with room for the given number of nodes joining it and half as many
+        again, since the room can not be raised once the graph has edges.
+        :param graph: The graph the core belongs to
+        :param new_nodes: The number of nodes about to join the core
+        """
+        self.planarity_graph, self.indices = get_planarity_graph(graph.subgraph(self.core),
+                                                                 (len(self.core) + new_nodes) * 3 // 2)
+
+    def get_new_indices(self, graph, nodes):
+        """
+        Get the indices in the planarity graph of the given nodes, giving free indices to the ones that were never in
+        the core. The new indices are not stored, so they are only kept if the nodes join the core.
+        :param graph: The graph the core belongs to
+        :param nodes: The nodes to get the indices for
+        :return: Dict of node: vertex index, including the indices of the nodes that were in the core before
+        """
+        nodes = list(dict.fromkeys(nodes))
+        new_nodes = [node for node in nodes if node not in self.indices]
+        first_index = self.planarity_graph.gp_LowerBoundVertices() + len(self.indices)
+
+        if first_index + len(new_nodes) > self.planarity_graph.gp_UpperBoundVertices():
+            # The copy only keeps the nodes that are still in the core
+            self.copy_core(graph, len(nodes))
+            new_nodes = [node for node in nodes if node not in self.indices]
+            first_index = self.planarity_graph.gp_LowerBoundVertices() + len(self.indices)
+
+        return {**self.indices, **{node: first_index + i for i, node in enumerate(new_nodes)}}
+
+    def get_path_to_core(self, graph, node, target=None):
+        """
+        Find the path from the given node through the tree it lies in to the core, with a breadth first search that
+        does not enter the core.
+        :param graph: The graph the core belongs to
+        :param node: The node to start from
+        :param target: A node outside the core to stop at as well
+        :return: List of the nodes on the path, ending with a node of the core or the target, or None if the tree of the
+        node has neither
+        """
+        if node in self.core:
+            return [node]
+
+        parents = {node: None}
+        frontier = [node]
+
+        while len(frontier) > 0:
+            next_frontier = []
+
+            for frontier_node in frontier:
+                for neighbor in graph.neighbors(frontier_node):
+                    if neighbor in parents:
+                        continue
+
+                    parents[neighbor] = frontier_node
+
+                    if neighbor in self.core or neighbor == target:
+                        path = [neighbor]
+
+                        while parents[path[-1]] is not None:
+                            path.append(parents[path[-1]])
+
+                        return path[::-1]
+
+                    next_frontier.append(neighbor)
+
+            frontier = next_frontier
+
+        return None
+
+    def get_core_walk(self, graph, u, v):
+        """
+        Get the edges that join the core when the given edge is added, as a walk through the paths from u and v to the
+        core and the edge itself. The walk is a path between two nodes of the core, or it ends in a node it already
+        visited, so the new edges hang off the core at that single node, or form a cycle of their own.
+        :param graph: The graph the core belongs to, without the given edge
+        :param u: The first node of the edge
+        :param v: The second node of the edge
+        :return: List of the nodes of the walk, or None if the core does not change, because the edge joins a tree
+        without a core to another component
+        """
+        u_path = self.get_path_to_core(graph, u)
+        v_path = self.get_path_to_core(graph, v)
+
+        if u_path is None or v_path is None:
+            if u_path is not None or v_path is not None or self.components[u] != self.components[v]:
+                return None
+
+            # Both lie in a tree without a core, so the edge closes a cycle if it is the same tree, and the components
+            # can only disagree if they were joined by an edge that was removed again
+            tree_path = self.get_path_to_core(graph, u, v)
+            return None if tree_path is None else tree_path + [u]
+
+        u_path_nodes = set(u_path)
+
+        # Paths through the same tree meet before the core, and share the rest of the way to it
+        for i, node in enumerate(v_path):
+            if node in u_path_nodes:
+                return u_path[::-1] + v_path[:i + 1]
+
+        # Paths that end in different components of the core join them
+        return u_path[::-1] + v_path
+
+    def get_common_face_corners(self, u, v):
+        """
+        Find a face of the embedding that both given nodes lie on.
+        :param u: The first node
+        :param v: The second node
+        :return: The half-edges leaving u and v on that face, or None if the nodes share no face
+        """
+        # Nodes without edges lie on every face around them, so any corner of the other node will do
+        if self.embedding.degree[u] == 0 or self.embedding.degree[v] == 0:
+            return self.embedding.first[u], self.embedding.first[v]
+
+        # Different components can be placed inside any face of each other
+        if self.components[u] != self.components[v]:
+            return self.embedding.first[u], self.embedding.first[v]
+
+        # Walk the faces around the endpoint with the fewest corners
+        if self.embedding.degree[v] < self.embedding.degree[u]:
+            corners = self.find_on_faces_around(v, u)
+            return None if corners is None else (corners[1], corners[0])
+
+        return self.find_on_faces_around(u, v)
+
+    def find_on_faces_around(self, u, v):
+        """
+        Find a face around u that v lies on.
+        :param u: The node whose faces are walked
+        :param v: The node to be found
+        :return: The half-edges leaving u and v on that face, or None if v is on none of the faces
+        """
+        for u_corner in self.embedding.half_edges(u):
+            for h in self.embedding.traverse_face(u_corner):
+                if self.embedding.origin[h] == v:
+                    return u_corner, h
+
+        return None
+
+    def add_walk_to_core(self, graph, walk, corners):
+        """
+        Add the edges of the given walk to the core, the embedding and the planarity graph. The walk is drawn inside a
+        single face, so every edge is placed next to the previous one, and a walk that ends in a node it visited before
+        is closed on the face it was drawn in.
+        :param graph: The graph the core belongs to
+        :param walk: The nodes of the walk, as given by get_core_walk
+        :param corners: The half-edges leaving the first and the last node of a path on the face to draw it in, with
+        None for the last node of a closed walk, or for nodes without edges
+        """
+        self.indices = self.get_new_indices(graph, walk)
+
+        for i in range(len(walk) - 1):
+            x, y = walk[i], walk[i + 1]
+
+            for node in (x, y):
+                if node not in self.embedding.first:
+                    self.embedding.add_node(node)
+
+            # After the first edge, x only has the edge to the previous node
+            x_corner = corners[0] if i == 0 else self.embedding.first[x]
+
+            if i < len(walk) - 2:
+                y_corner = None
+            elif corners[1] is not None or y not in walk[:-1]:
+                y_corner = corners[1]
+            else:
+                y_corner = self.get_common_face_corners(x, y)[1]
+
+            h = self.embedding.new_edge(x, y)
+            self.embedding.insert_half_edge_cw(h, x_corner)
+            self.embedding.insert_half_edge_cw(h ^ 1, y_corner)
+            self.planarity_graph.gp_DynamicAddEdge(self.indices[x], 0, self.indices[y], 0)
+
+        self.core.update(walk)
+
+    def try_add_edge_to_embedding(self, graph, u, v):
+        """
+        Add the given edge to the graph if it can not break planarity, because it joins two components, it only adds
+        edges that hang off a single node of the core, or the paths it adds to the core end on a common face of the
+        embedding.
+        :param graph: The graph the embedding belongs to
+        :param u: The first node of the edge
+        :param v: The second node of the edge
+        :return: Whether the edge was added
+        """
+        walk = self.get_core_walk(graph, u, v)
+
+        if walk is not None:
+            if walk[-1] in walk[:-1]:
+                corners = self.embedding.first.get(walk[0]), None
+            else:
+                corners = self.get_common_face_corners(walk[0], walk[-1])
+
+                if corners is None:
+                    return False
+
+            self.add_walk_to_core(graph, walk, corners)
+
+        self.components.union(u, v)
+        graph.add_edge(u, v)
+
+        return True
+
+    def add_edges_by_bisection(self, graph, edges):
+        """
+        Add the given edges to the graph with planarity tests, splitting the edges in halves whenever they can not all
+        be added, until the edges that break planarity on their own are found. Each test runs on a duplicate of the
+        planarity graph with only the paths of the tested edges added, and the embedding is taken from the duplicate
+        when it passes. The edges must be ones that try_add_edge_to_embedding left, whose endpoints are both joined to
+        the core, since the paths of edges through trees without a core do not show how the edges interact.
+        :param graph: The planar graph to add the edges to
+        :param edges: The edges to be added
+        :return: List of the edges that were not added
+        """
+        # Paths through the same tree share edges, which are only added once
+        walk_edges = {}
+
+        for u, v in edges:
+            walk = self.get_core_walk(graph, u, v) or []
+
+            for x, y in zip(walk, walk[1:]):
+                walk_edges.setdefault(frozenset((x, y)), (x, y))
+
+        indices = self.get_new_indices(graph, [node for edge in walk_edges.values() for node in edge])
+        planarity_graph = self.planarity_graph.gp_DupGraph()
+
+        for x, y in walk_edges.values():
+            planarity_graph.gp_DynamicAddEdge(indices[x], 0, indices[y], 0)
+
+        if planarity_graph.gp_Embed(planarity.EMBEDFLAGS_PLANAR) == planarity.OK:
+            self.indices = indices
+
+            for x, y in walk_edges.values():
+                self.planarity_graph.gp_DynamicAddEdge(indices[x], 0, indices[y], 0)
+                self.core.update((x, y))
+
+            for u, v in edges:
+                self.components.union(u, v)
+
+            graph.add_edges_from(edges)
+            # The paths did not fit the embedding, so the one the test found replaces it
+            self.embedding = HalfEdgeEmbedding.from_rotation_system(get_embedded_rotation_system(planarity_graph,
+                                                                                                 indices))
+            return []
+
+        if len(edges) == 1:
+            return edges
+
+        middle = len(edges) // 2
+        return self.add_edges_by_bisection(graph, edges[:middle]) + self.add_edges_by_bisection(graph, edges[middle:])
+
+    def keep_planar_edges(self, graph, edges):
+        """
+        Remove the given edges from the graph again where they break planarity, keeping the other ones. Edges are
+        first added without a test where possible, the rest is found by bisection.
+        :param graph: The graph that contains the given edges, and is planar without them
+        :param edges: The candidate edges
+        :return: List of the edges that were removed
+        """
+        graph.remove_edges_from(edges)
+
+        remaining_edges = [(u, v) for u, v in edges if not self.try_add_edge_to_embedding(graph, u, v)]
+
+        if len(remaining_edges) == 0:
+            return []
+
+        return self.add_edges_by_bisection(graph, remaining_edges)
+
+    def remove_core_edge(self, u, v):
+        """
+        Remove an edge between two nodes of the core from the embedding and the planarity graph.
+        :param u: The first node of the edge
+        :param v: The second node of the edge
+        """
+        self.embedding.remove_edge(self.embedding.get_half_edge(u, v))
+        self.planarity_graph.gp_DeleteEdge(self.planarity_graph.gp_FindEdge(self.indices[u], self.indices[v]))
+
+    def remove_edge(self, graph, u, v):
+        """
+        Remove an edge that was accepted before from the graph, and from the core if it was part of it. Nodes of the
+        core that are left with fewer than 2 neighbors in it are removed from it, until it is the 2-core again. The
+        components are left as they are, so they may join nodes that are no longer connected, which only skips a
+        shortcut.
+        :param graph: The graph the embedding belongs to
+        :param u: The first node of the edge
+        :param v: The second node of the edge
+        """
+        graph.remove_edge(u, v)
+
+        if u not in self.core or v not in self.core:
+            return
+
+        self.remove_core_edge(u, v)
+        nodes = [u, v]
+
+        while len(nodes) > 0:
+            node = nodes.pop()
+
+            if node not in self.core or sum(neighbor in self.core for neighbor in graph.neighbors(node)) >= 2:
+                continue
+
+            self.core.remove(node)
+
+            for neighbor in graph.neighbors(node):
+                if neighbor in self.core:
+                    self.remove_core_edge(node, neighbor)
+                    nodes.append(neighbor)
@@ -0,0 +1,14 @@
+import networkx as nx
+
+from graph_coloring.generic.csp.solve import csp_solve
+from graph_generation.graph_checker import GraphChecker
+
+
+def test_csp_solve_colors_isolated_vertices():
+    graph = nx.relabel_nodes(nx.circular_ladder_graph(5), str)
+    graph.add_node('isolated')
+
+    colors = csp_solve(graph.copy())
+
+    assert colors is not None
+    GraphChecker.valid_3_coloring(graph, colors)
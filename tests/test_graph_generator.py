@@ -0,0 +1,26 @@
+import networkx as nx
+
+from graph_generation.graph_checker import GraphChecker
+from graph_generation.graph_generator import GraphGenerator
+
+
+def test_planar_triangle_free_generation_has_3_core():
+    generator = GraphGenerator(checker=GraphChecker)
+
+    for odd_fraction in [0, 0.1, 0.3]:
+        graph = generator.planar_triangle_free_generation(500, odd_fraction, seed=1, verify=True)
+
+        assert len(graph) == 500
+        assert len(nx.k_core(graph, 3)) == len(graph)
+        assert nx.is_bipartite(graph) == (odd_fraction == 0)
+
+
+def test_p7_c3_free_generation_with_average_degree_is_sparse():
+    generator = GraphGenerator(checker=GraphChecker)
+
+    for nodes in [1000, 10000]:
+        graph = generator.p7_c3_free_generation(nodes, 0.3, seed=1, average_degree=8)
+
+        assert len(graph) == nodes
+        assert nx.is_connected(graph)
+        assert graph.number_of_edges() <= 10 * nodes